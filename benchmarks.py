@@ -0,0 +1,298 @@
+"""Microbenchmarks for the scraper's hot paths.
+
+Usage:
+    python benchmarks.py [--corpus DIR] [--repeat N]
+
+--corpus points at a directory of saved pages (*.html / *.htm). Without it
+a synthetic corpus of fashion-wholesaler storefront pages is generated,
+with the inline scripts, CSS at-rules, JSON-LD and social handles that
+make real pages slow to scan.
+"""
+import argparse
+import glob
+import os
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+
+from email_scraper_final import (
+    EMAIL_PATTERN, LINK_PARSER, PAGE_CHUNK_SIZE, STRUCTURED_EMAIL_WINDOW, SelectolaxParser, extract_emails,
+    extract_internal_links, extract_structured_emails, filter_emails, iter_link_hrefs, lxml_etree,
+    scan_boundary, dedupe_companies, normalize_company_name, normalize_company_names
+)
+
+BRANDS = ['bellarose', 'lunaboutique', 'coastalthreads', 'velvetvine', 'urbanpetal',
+          'goldenhourco', 'sagestyle', 'midnightmuse', 'cottonandclay', 'wildflowerwear']
+
+def legacy_filter_emails(emails, url):
+    """The original find_emails_on_page() filter, kept as the benchmark baseline"""
+    filtered_emails = []
+    for email in emails:
+        email_lower = email.lower()
+        if not any(x in email_lower for x in [
+            'example.com', 'test.com', 'placeholder', 'yoursite', 'yourdomain',
+            'sampleemail', 'noreply', 'no-reply', 'donotreply', 'do-not-reply',
+            'admin@admin', 'test@test', 'user@user', 'email@email',
+            'support@example', 'info@example', 'contact@example'
+        ]):
+            email_domain = email_lower.split('@')[1] if '@' in email_lower else ''
+            website_domain = url.split('/')[2].lower() if len(url.split('/')) > 2 else ''
+            if email_domain and (
+                email_domain in website_domain or
+                website_domain in email_domain or
+                len(email_domain.split('.')) >= 2
+            ):
+                filtered_emails.append(email)
+    return list(set(filtered_emails))
+
+def legacy_company_key(name):
+    """The original clean_company_name() + cache key normalization, kept as the benchmark baseline"""
+    if pd.isna(name) or name is None or str(name).strip() == '':
+        return None
+    name = str(name).strip()
+    suffixes = [' LLC', ' Inc', ' Corp', ' Corporation', ' Ltd', ' Limited', ' Co', ' Company']
+    for suffix in suffixes:
+        if name.upper().endswith(suffix.upper()):
+            name = name[:-len(suffix)].strip()
+    return ' '.join(name.lower().split()) if name else None
+
+def synthetic_company_names(count, rng):
+    """Company names spelled the many ways buyers type them into FashionGo"""
+    words = ['Bella', 'Rose', 'Luna', 'Boutique', 'Coastal', 'Threads', 'Velvet', 'Vine', 'Urban', 'Petal',
+             'Golden', 'Hour', 'Sage', 'Style', 'Midnight', 'Muse', "Mary's", 'Closet', 'Wildflower', 'Wear']
+    suffixes = ['', '', '', ' LLC', ' L.L.C.', ', Inc.', ' Inc', ' Co.', ' & Co', ' Corp', ' Ltd']
+    names = []
+    for _ in range(count):
+        name = ' '.join(rng.sample(words, rng.randint(1, 3))) + rng.choice(suffixes)
+        names.append(rng.choice([name, name.upper(), name.lower(), f'  {name} ']))
+    return names
+
+def synthetic_page(brand, rng):
+    """A storefront homepage shaped like the ones FashionGo buyers run"""
+    css = ''.join(
+        f'.product-card-{i}{{margin:{i % 7}px;color:#{rng.randrange(0xffffff):06x}}}'
+        f'@media (max-width:{600 + i}px){{.grid-{i}{{display:block}}}}'
+        for i in range(rng.randint(300, 900))
+    )
+    products = ','.join(
+        f'{{"id":{rng.randrange(10**9)},"title":"Floral Midi Dress {i}","price":"{rng.randint(20, 90)}.00",'
+        f'"handle":"floral-midi-dress-{i}","vendor":"{brand}"}}'
+        for i in range(rng.randint(200, 800))
+    )
+    grid = ''.join(
+        f'<div class="product-card"><a href="/products/item-{i}"><img src="/cdn/shop/files/{i}.jpg" '
+        f'alt="Women&#39;s Item {i}"></a><span class="price">${rng.randint(20, 90)}.00</span></div>'
+        for i in range(rng.randint(40, 120))
+    )
+    footer_emails = [f'info@{brand}.com', f'wholesale@{brand}.com', 'noreply@shopify.com', 'email@example.com']
+    rng.shuffle(footer_emails)
+    return (
+        f'<!doctype html><html><head><title>{brand}</title><style>{css}</style>'
+        f'<script type="application/ld+json">{{"@context":"https://schema.org","@type":"Organization",'
+        f'"name":"{brand}","url":"https://{brand}.com"}}</script>'
+        f'<script>window.ShopifyAnalytics={{"products":[{products}]}};</script></head>'
+        f'<body><nav><a href="/pages/contact">Contact</a><a href="/pages/about-us">About</a></nav>'
+        f'<main>{grid}</main><footer>Follow us @{brand} on Instagram. '
+        + ' | '.join(f'<a href="mailto:{email}">{email}</a>' for email in footer_emails[:rng.randint(0, 4)])
+        + '</footer></body></html>'
+    )
+
+def synthetic_results_page(query, rng, results=30):
+    """A DuckDuckGo Lite results page: a table of result links, snippets and navigation"""
+    rows = []
+    for i in range(results):
+        brand = rng.choice(BRANDS)
+        url = f"https://{brand}{i}.com/collections/all?utm_source=ddg&amp;ref={rng.randrange(10**6)}"
+        rows.append(
+            f'<tr><td valign="top">{i + 1}.&nbsp;</td><td><a rel="nofollow" href="{url}" class=\'result-link\'>'
+            f'{brand.title()} Boutique | Women\'s Clothing</a></td></tr>'
+            f'<tr><td>&nbsp;&nbsp;&nbsp;</td><td class=\'result-snippet\'>Shop the latest {query} styles '
+            f'at {brand.title()}. Free shipping on orders over $75. Dresses, tops &amp; more.</td></tr>'
+            f'<tr><td>&nbsp;&nbsp;&nbsp;</td><td><span class=\'link-text\'>{brand}{i}.com</span></td></tr>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta http-equiv="content-type" content="text/html; charset=UTF-8">'
+        f'<title>{query} at DuckDuckGo</title><style>' + 'td{padding:2px}' * 200 + '</style></head><body>'
+        '<form action="/lite/" method="post"><input type="text" name="q" value="' + query + '"></form>'
+        '<table border="0">' + ''.join(rows) + '</table>'
+        '<a href="/lite/?q=next&amp;s=30">Next Page &gt;</a><a href="https://duckduckgo.com/">DuckDuckGo</a>'
+        '</body></html>'
+    ).encode('utf-8')
+
+def load_corpus(corpus_dir, count=40, seed=7):
+    """Return (url, html) pairs from a directory of saved pages, or a synthetic corpus"""
+    if corpus_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(corpus_dir, '*.htm*'))):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append((f"https://{os.path.splitext(os.path.basename(path))[0]}/", f.read()))
+        return pages
+    rng = random.Random(seed)
+    return [(f'https://{brand}.com/', synthetic_page(brand, rng))
+            for brand in (rng.choice(BRANDS) for _ in range(count))]
+
+def best_time(func, repeat):
+    """Fastest of `repeat` runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def bench_email_extraction(pages, repeat):
+    """Full-text findall + substring blacklist vs. anchored extraction + compiled blacklist"""
+    def legacy():
+        return [legacy_filter_emails(set(EMAIL_PATTERN.findall(html)), url) for url, html in pages]
+
+    def current():
+        return [filter_emails(set(extract_emails(html)), url) for url, html in pages]
+
+    def streamed():
+        # What read_page_stream runs per region, structured forms included
+        results = []
+        for url, html in pages:
+            emails, recent, carry = set(), '', ''
+            for start in range(0, len(html) + PAGE_CHUNK_SIZE, PAGE_CHUNK_SIZE):
+                buffer = carry + html[start:start + PAGE_CHUNK_SIZE]
+                cut = scan_boundary(buffer) if start < len(html) else len(buffer)
+                region, carry = buffer[:cut], buffer[cut:]
+                emails.update(extract_emails(region))
+                window = recent + region
+                recent = window[-STRUCTURED_EMAIL_WINDOW:]
+                emails.update(extract_structured_emails(window))
+            results.append(filter_emails(emails, url))
+        return results
+
+    mismatches = sum(set(a) != set(b) for a, b in zip(legacy(), current()))
+    stream_mismatches = sum(set(a) != set(b) for a, b in zip(legacy(), streamed()))
+    total_mb = sum(len(html) for _, html in pages) / 1e6
+    legacy_time = best_time(legacy, repeat)
+    current_time = best_time(current, repeat)
+    streamed_time = best_time(streamed, repeat)
+
+    print(f"Email extraction over {len(pages)} pages ({total_mb:.1f} MB)")
+    print(f"  findall + any() blacklist:     {legacy_time * 1000:8.1f} ms")
+    print(f"  '@'-anchored + compiled list:  {current_time * 1000:8.1f} ms  ({legacy_time / current_time:.1f}x)")
+    print(f"  + structured, per stream chunk:{streamed_time * 1000:8.1f} ms  ({legacy_time / streamed_time:.1f}x)")
+    print(f"  pages with different results: {mismatches} (streamed: {stream_mismatches})")
+
+def peak_memory(func):
+    """Peak memory traced while running func, in bytes"""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def bench_search_links(repeat, pages=20):
+    """BeautifulSoup html.parser tree vs. the selective link extractor, per results page"""
+    rng = random.Random(11)
+    results_pages = [synthetic_results_page(f'{rng.choice(BRANDS)} website', rng) for _ in range(pages)]
+
+    def soup_links(content):
+        return [link.get('href', '') for link in BeautifulSoup(content, 'html.parser').find_all('a')]
+
+    parsers = {'bs4 html.parser': soup_links}
+    for name, available in (('selectolax', SelectolaxParser), ('lxml', lxml_etree), ('regex', True)):
+        if available:
+            parsers[name] = lambda content, name=name: list(iter_link_hrefs(content, parser=name))
+
+    expected = [[href for href in soup_links(content) if href] for content in results_pages]
+    print(f"Search results link extraction ({pages} pages, {sum(map(len, results_pages)) / pages / 1024:.0f} KB each)")
+    for name, parse in parsers.items():
+        elapsed = best_time(lambda: [parse(content) for content in results_pages], repeat)
+        peak = sum(peak_memory(lambda: parse(content)) for content in results_pages)
+        same = all([href for href in parse(content) if href] == hrefs
+                   for content, hrefs in zip(results_pages, expected))
+        print(f"  {name:16s} {elapsed / pages * 1000:7.2f} ms/page  {peak / pages / 1024:8.1f} KB/page"
+              f"  {'same links' if same else 'DIFFERENT LINKS'}")
+
+def bench_internal_links(pages, repeat):
+    """Full html.parser tree vs. the selective extractor for a fetched page's internal links"""
+    def soup_links(url, text):
+        return [urljoin(url, anchor['href'].strip()).split('#')[0]
+                for anchor in BeautifulSoup(text, 'html.parser').find_all('a', href=True)]
+
+    def current():
+        return [extract_internal_links(text, url) for url, text in pages]
+
+    soup_time = best_time(lambda: [soup_links(url, text) for url, text in pages], repeat)
+    current_time = best_time(current, repeat)
+    largest = max(len(text) for _, text in pages)
+    print(f"Internal link extraction over {len(pages)} pages (largest {largest / 1024:.0f} KB)")
+    print(f"  {'bs4 html.parser tree':22s} {soup_time / len(pages) * 1000:7.2f} ms/page")
+    print(f"  {f'selective ({LINK_PARSER})':22s} {current_time / len(pages) * 1000:7.2f} ms/page"
+          f"  ({soup_time / current_time:.1f}x)")
+
+def bench_name_normalization(repeat, count=100_000):
+    """Per-value suffix loop vs. per-value regex key vs. vectorized key over a whole column"""
+    names = pd.Series(synthetic_company_names(count, random.Random(5)), dtype=object)
+    timings = {
+        'legacy per-value loop': best_time(lambda: names.map(legacy_company_key), repeat),
+        'regex per-value': best_time(lambda: names.map(normalize_company_name), repeat),
+        'vectorized column': best_time(lambda: normalize_company_names(names), repeat),
+    }
+    legacy_keys = names.map(legacy_company_key).nunique()
+    keys = normalize_company_names(names).nunique()
+    print(f"Company name normalization ({count:,} names)")
+    for name, elapsed in timings.items():
+        print(f"  {name:22s} {elapsed * 1000:8.1f} ms")
+    print(f"  distinct keys: {legacy_keys:,} legacy, {keys:,} normalized")
+
+# Spellings that must share one lookup, and different businesses that must not
+SAME_COMPANY = [
+    ('Bella Boutique LLC', 'BELLA BOUTIQUE'), ('Bella Boutique, Inc.', 'Bella Boutiques'),
+    ('Bella Rose', 'bellarose'), ("Mary's Closet", 'Marys Closet'), ('Luna Dress', 'Luna Dresses'),
+]
+DIFFERENT_COMPANIES = [
+    ('Natalie Boutique', 'Natalia Boutique'), ('Kristen Boutique', 'Kirsten Boutique'),
+    ("Sophia's Closet", "Sophie's Closet"), ('Marlene Closet', 'Marlena Closet'),
+    ('Velvet Rose', 'Velvet Rose Boutique'), ('Bella Rose', 'Bella Rosa'), ('Luna', 'Lunas Boutique'),
+]
+
+# Longer names that share a pair's words, so a pair is also checked inside a crowd
+CROWD_SUFFIXES = ['Austin', 'Boston', 'Chicago', 'Dallas', 'Denver', 'Miami', 'Orlando', 'Phoenix',
+                  'Portland', 'Seattle', 'Tampa']
+
+def grouped_together(pair, crowd=False):
+    """True if dedupe_companies gives both names of a pair one lookup, alone or among similar names"""
+    names = list(pair) + ([f'{pair[0]} {suffix}' for suffix in CROWD_SUFFIXES] if crowd else [])
+    return any(0 in rows and 1 in rows for rows in dedupe_companies(names)[1])
+
+def bench_name_clustering(count=100_000):
+    """Clustering time over a large column, plus the known same/different name pairs"""
+    names = synthetic_company_names(count, random.Random(5))
+    start = time.perf_counter()
+    lookup_names, _, _ = dedupe_companies(names)
+    elapsed = time.perf_counter() - start
+    missed = [pair for pair in SAME_COMPANY if not (grouped_together(pair) and grouped_together(pair, crowd=True))]
+    merged = [pair for pair in DIFFERENT_COMPANIES if grouped_together(pair) or grouped_together(pair, crowd=True)]
+    print(f"Company name clustering ({count:,} names)")
+    print(f"  {elapsed * 1000:8.1f} ms, {len(lookup_names):,} lookups")
+    print(f"  same-company pairs kept apart:    {missed or 'none'}")
+    print(f"  different companies merged:       {merged or 'none'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='directory of saved HTML pages')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    bench_email_extraction(pages, args.repeat)
+    print()
+    bench_search_links(args.repeat)
+    print()
+    bench_internal_links(pages, args.repeat)
+    print()
+    bench_name_normalization(args.repeat)
+    print()
+    bench_name_clustering()
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,55 @@
 from flask import Flask, request, jsonify, send_file
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import numpy as np
+import openpyxl
+import aiohttp
+import asyncio
+
+# Optional faster HTML parsers for pulling links out of search results pages
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+# Parquet output is only offered when pyarrow is installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 import re
 import os
 import time
 import tempfile
 import logging
+import bisect
+import codecs
+import collections
+import contextvars
+import difflib
+import hashlib
+import html
+import io
+import itertools
+import json
+import queue
+import socket
+import sqlite3
+import string
+import threading
+import unicodedata
+import uuid
+from aiohttp.abc import AbstractResolver
+from contextlib import asynccontextmanager, closing
+from urllib.parse import unquote, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
 from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
@@ -16,22 +59,1034 @@ app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Counters for the job whose lookups are running in the current task
+job_stats = contextvars.ContextVar('job_stats', default=None)
+
+# time.monotonic() by which the company being looked up in the current task must be done
+company_deadline = contextvars.ContextVar('company_deadline', default=None)
+
+# Job store and background worker settings
+DATA_DIR = os.environ.get('DATA_DIR', tempfile.gettempdir())
+DB_PATH = os.path.join(DATA_DIR, 'email_scraper.db')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+
+# Lookup concurrency per stage (companies searching vs. companies having their pages fetched)
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', 4))
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', 32))
+
+# Shared HTTP connection pools
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 100))
+HTTP_PER_HOST_LIMIT = int(os.environ.get('HTTP_PER_HOST_LIMIT', 4))
+HTTP_KEEPALIVE = float(os.environ.get('HTTP_KEEPALIVE', 30))
+
+# Per-host state (DNS answers, latency samples, breaker counts, robots.txt
+# delays) is kept for at most this many hosts, least recently used dropped first
+HOST_STATE_LIMIT = int(os.environ.get('HOST_STATE_LIMIT', 10000))
+
+# Adaptive timeouts: recent samples kept per host, samples needed before
+# they are trusted, multiple of p95 latency allowed, and bounds (seconds).
+# COMPANY_DEADLINE caps the time spent on one company across all its requests
+LATENCY_WINDOW = int(os.environ.get('LATENCY_WINDOW', 50))
+LATENCY_MIN_SAMPLES = int(os.environ.get('LATENCY_MIN_SAMPLES', 5))
+LATENCY_TIMEOUT_FACTOR = float(os.environ.get('LATENCY_TIMEOUT_FACTOR', 3))
+MIN_REQUEST_TIMEOUT = float(os.environ.get('MIN_REQUEST_TIMEOUT', 3))
+MAX_REQUEST_TIMEOUT = float(os.environ.get('MAX_REQUEST_TIMEOUT', 30))
+COMPANY_DEADLINE = float(os.environ.get('COMPANY_DEADLINE', 90))
+
+# Circuit breaker: consecutive failures (timeouts, connection errors, 5xx)
+# that trip a host, and how long it is then skipped (seconds)
+BREAKER_THRESHOLD = int(os.environ.get('BREAKER_THRESHOLD', 2))
+BREAKER_COOLDOWN = float(os.environ.get('BREAKER_COOLDOWN', 600))
+
+# DNS cache lifetimes for resolved and unresolvable hosts, and the lookup timeout (seconds)
+DNS_CACHE_TTL = int(os.environ.get('DNS_CACHE_TTL', 300))
+DNS_NEGATIVE_TTL = int(os.environ.get('DNS_NEGATIVE_TTL', 3600))
+DNS_TIMEOUT = float(os.environ.get('DNS_TIMEOUT', 5))
+
+# Streaming page reads: chunk size, byte cap and how many emails are enough
+PAGE_CHUNK_SIZE = 16 * 1024
+MAX_PAGE_BYTES = int(os.environ.get('MAX_PAGE_BYTES', 1024 * 1024))
+PAGE_EMAIL_LIMIT = int(os.environ.get('PAGE_EMAIL_LIMIT', 3))
+# Content types worth scanning: HTML and XHTML, plus plain text, which some
+# hosts send for contact pages and misconfigured HTML
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'application/xml', 'text/plain')
+MAX_EMAIL_LENGTH = 254
+EMAIL_DELIMITERS = ' \t\r\n<>"\'(),;:'
+
+# Politeness: minimum seconds between requests to one host, search engine
+# token buckets (requests per second and burst size), robots.txt limits
+HOST_MIN_DELAY = float(os.environ.get('HOST_MIN_DELAY', 0.5))
+SEARCH_RATE = float(os.environ.get('SEARCH_RATE', 1.0))
+SEARCH_BURST = int(os.environ.get('SEARCH_BURST', 2))
+MAX_CRAWL_DELAY = float(os.environ.get('MAX_CRAWL_DELAY', 10))
+ROBOTS_TIMEOUT = float(os.environ.get('ROBOTS_TIMEOUT', 5))
+
+# Company -> website cache lifetimes (seconds) for found and not-found results
+WEBSITE_CACHE_TTL = int(os.environ.get('WEBSITE_CACHE_TTL', 30 * 24 * 3600))
+WEBSITE_CACHE_NEGATIVE_TTL = int(os.environ.get('WEBSITE_CACHE_NEGATIVE_TTL', 24 * 3600))
+
+# Search providers, in order: the first gets every query variant, the rest
+# are fallbacks. "local" answers offline from fixtures (see LocalSearchProvider)
+SEARCH_PROVIDERS = os.environ.get('SEARCH_PROVIDERS', 'duckduckgo,google')
+LOCAL_SEARCH_FIXTURES = os.environ.get('LOCAL_SEARCH_FIXTURES')
+LOCAL_FIXTURE_URL = os.environ.get('LOCAL_FIXTURE_URL', f"http://127.0.0.1:{os.environ.get('PORT', 5000)}/fixtures/sites")
+LOCAL_SEARCH_LATENCY = float(os.environ.get('LOCAL_SEARCH_LATENCY', 0))
+LOCAL_FIXTURE_LATENCY = float(os.environ.get('LOCAL_FIXTURE_LATENCY', 0))
+
+# Domain guessing: try <name>.com and friends before searching. Off
+# automatically when the local search provider is in use
+DOMAIN_GUESSING = os.environ.get('DOMAIN_GUESSING', '1') != '0'
+DOMAIN_GUESS_MIN_LENGTH = int(os.environ.get('DOMAIN_GUESS_MIN_LENGTH', 5))
+DOMAIN_GUESS_TIMEOUT = float(os.environ.get('DOMAIN_GUESS_TIMEOUT', 5))
+DOMAIN_GUESS_MAX_BYTES = int(os.environ.get('DOMAIN_GUESS_MAX_BYTES', 64 * 1024))
+# Text that marks a guessed domain as parked or for sale rather than a storefront
+PARKED_PAGE_PATTERN = re.compile('|'.join(re.escape(marker) for marker in [
+    'domain is for sale', 'domain may be for sale', 'buy this domain', 'domain for sale',
+    'domain is parked', 'parked domain', 'parked free', 'parkingcrew', 'sedoparking', 'sedo.com',
+    'bodis.com', 'hugedomains', 'dan.com', 'afternic', 'above.com', 'domain parking',
+]), re.IGNORECASE)
+# Markup dropped before looking for the company's name in a guessed homepage
+PAGE_MARKUP_PATTERN = re.compile(r'<script\b.*?</script>|<style\b.*?</style>|<[^>]*>', re.IGNORECASE | re.DOTALL)
+
+# Search results: how long a query's result links are reused, and the match
+# confidence (0-1) at which no further query variants are tried
+SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 14 * 24 * 3600))
+SEARCH_CONFIDENCE = float(os.environ.get('SEARCH_CONFIDENCE', 0.75))
+
+# How long a 404/410 page is trusted before it is requested again (seconds)
+PAGE_CACHE_MISSING_TTL = int(os.environ.get('PAGE_CACHE_MISSING_TTL', 7 * 24 * 3600))
+
+# Name clustering: whether spacing and plural variants of a name share one
+# lookup (0 turns it off)
+NAME_CLUSTERING = os.environ.get('NAME_CLUSTERING', '1') != '0'
+
+# Rows per chunk when streaming an upload
+UPLOAD_CHUNK_ROWS = int(os.environ.get('UPLOAD_CHUNK_ROWS', 10000))
+
+# Trailing legal suffixes, however they are punctuated: " LLC", " L.L.C.", ", Inc.", " & Co., Ltd"
+LEGAL_SUFFIX_PATTERN = re.compile(
+    r'(?:[\s,&]+(?:l\.?\s?l\.?\s?c|inc(?:orporated)?|corp(?:oration)?|ltd|limited|co|company)\.?)+\s*$',
+    re.IGNORECASE
+)
+APOSTROPHE_PATTERN = re.compile(r"['\u2019]")
+NAME_PUNCTUATION_PATTERN = re.compile(r'[\W_]+')
+
+COMPANY_COLUMNS = ['companyName', 'shipToCompanyName', 'company_name', 'Company Name', 'Company', 'Name']
+
 EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+MAX_LOCAL_PART_LENGTH = 64
+MAX_DOMAIN_LENGTH = 255
+LOCAL_PART_CHARS = frozenset(string.ascii_letters + string.digits + '._%+-')
+DOMAIN_CHARS = frozenset(string.ascii_letters + string.digits + '.-')
+
+# Link extraction for search results pages
+LINK_PARSER = 'lxml' if lxml_etree else 'selectolax' if SelectolaxParser else 'regex'
+LINK_HREF_PATTERN = re.compile(rb'''<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+LINK_TEXT_PATTERN = re.compile(rb'[^>]*>(.{0,1000}?)</a\s*>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(rb'<[^>]*>')
+
+# Structured and obfuscated email forms (see extract_structured_emails). Each
+# marker anchors a window of STRUCTURED_EMAIL_WINDOW characters either side,
+# and only those windows are decoded. 'email' covers data-cfemail,
+# /email-protection# and JSON/itemprop "email"; '64;' and 'x40;' cover the
+# &#64;, &#064; and &#x40; entities
+STRUCTURED_EMAIL_WINDOW = 512
+STRUCTURED_EMAIL_MARKERS = ('mailto:', 'email', '64;', 'x40;', '&commat;', '%40', 'at]', 'at)', 'at}')
+MAILTO_PATTERN = re.compile(r'mailto:([^"\'?>\s]+)', re.IGNORECASE)
+CFEMAIL_PATTERN = re.compile(r'(?:data-cfemail=["\']|/cdn-cgi/l/email-protection#)([0-9a-fA-F]{4,})')
+SCHEMA_EMAIL_PATTERN = re.compile(r'"email"\s*:\s*"([^"]{3,254})"', re.IGNORECASE)
+ITEMPROP_EMAIL_PATTERN = re.compile(
+    r'itemprop=["\']email["\'][^>]*?(?:content=["\']([^"\']+)["\'][^>]*>|>([^<]{3,254})<)', re.IGNORECASE)
+EMAIL_LABEL = r'[A-Za-z0-9-]+'
+# Only the bracketed "info [at] brand [dot] com" form: unbracketed "at ... dot"
+# matches ordinary prose like "visit us at brand dot com"
+BRACKETED_EMAIL_PATTERN = re.compile(
+    r'([A-Za-z0-9._%+-]+)\s*[\[({]\s*at\s*[\])}]\s*'
+    rf'({EMAIL_LABEL}(?:\s*(?:[\[({{]\s*dot\s*[\]}})]|\.)\s*{EMAIL_LABEL})+)',
+    re.IGNORECASE)
+DOT_TOKEN_PATTERN = re.compile(r'\s*[\[({]\s*dot\s*[\])}]\s*', re.IGNORECASE)
+
+# Substrings that mark an address as a placeholder or an unattended mailbox
+EMAIL_BLACKLIST = re.compile('|'.join(re.escape(entry) for entry in [
+    'example.com', 'test.com', 'placeholder', 'yoursite', 'yourdomain',
+    'sampleemail', 'noreply', 'no-reply', 'donotreply', 'do-not-reply',
+    'admin@admin', 'test@test', 'user@user', 'email@email',
+    'support@example', 'info@example', 'contact@example'
+]))
+
+# More comprehensive list of contact pages, in priority order
+CONTACT_PAGES = [
+    '/contact', '/contact-us', '/contactus', '/contact_us',
+    '/about', '/about-us', '/aboutus', '/about_us',
+    '/team', '/staff', '/people',
+    '/info', '/information',
+    '/support', '/help'
+]
+
+# Words that mark a link as a likely contact page, with their weight
+CONTACT_LINK_KEYWORDS = {
+    'contact': 10, 'get-in-touch': 8, 'get in touch': 8, 'reach': 3,
+    'wholesale': 3, 'customer-service': 4, 'customer service': 4,
+    'about': 5, 'team': 4, 'staff': 3, 'people': 2,
+    'info': 2, 'support': 2, 'help': 2, 'faq': 1,
+}
+CONTACT_LINK_CANDIDATES = int(os.environ.get('CONTACT_LINK_CANDIDATES', 3))
 
 def clean_company_name(name):
     if pd.isna(name) or name is None or str(name).strip() == '':
         return None
     
-    name = str(name).strip()
-    suffixes = [' LLC', ' Inc', ' Corp', ' Corporation', ' Ltd', ' Limited', ' Co', ' Company']
-    for suffix in suffixes:
-        if name.upper().endswith(suffix.upper()):
-            name = name[:-len(suffix)].strip()
-    
+    name = LEGAL_SUFFIX_PATTERN.sub('', str(name).strip()).strip()
     return name if name else None
 
-def find_emails_on_page(url, timeout=15):
-    """Find email addresses on a given webpage with improved error handling"""
+def normalize_company_name(name):
+    """Stable key for a company name: case-folded, legal suffixes and punctuation dropped.
+    
+    "Bella Rose, Inc.", "BELLA ROSE L.L.C." and "bella-rose" all become
+    "bella rose". Returns None when nothing is left.
+    """
+    if pd.isna(name) or name is None:
+        return None
+    key = unicodedata.normalize('NFKC', str(name)).casefold()
+    key = LEGAL_SUFFIX_PATTERN.sub('', key.strip())
+    key = NAME_PUNCTUATION_PATTERN.sub(' ', APOSTROPHE_PATTERN.sub('', key)).strip()
+    return key if key else None
+
+def normalize_company_names(names):
+    """normalize_company_name() over a whole Series of names at once.
+    
+    Exports repeat the same spellings many times, so only the distinct
+    spellings are normalized and the keys are then broadcast back.
+    """
+    codes, spellings = pd.factorize(names)
+    keys = pd.Series(spellings, dtype=object).astype(str).str.normalize('NFKC').str.casefold().str.strip()
+    keys = keys.str.replace(LEGAL_SUFFIX_PATTERN, '', regex=True)
+    keys = keys.str.replace(APOSTROPHE_PATTERN, '', regex=True)
+    keys = keys.str.replace(NAME_PUNCTUATION_PATTERN, ' ', regex=True).str.strip()
+    keys = keys.astype(object).where(keys != '', None).to_numpy()
+    # factorize codes missing values as -1; point them at an appended None
+    return pd.Series(np.append(keys, None)[codes], index=names.index, dtype=object)
+
+_db_lock = threading.Lock()
+_db_ready = False
+
+def get_db():
+    """Open a connection to the local store, creating its tables on first use"""
+    global _db_ready
+    if not _db_ready:
+        with _db_lock:
+            if not _db_ready:
+                init_db()
+                _db_ready = True
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_db():
+    """Create the job store and cache tables if they don't exist yet"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with closing(sqlite3.connect(DB_PATH, timeout=30)) as conn, conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            filename TEXT,
+            input_path TEXT,
+            company_column TEXT,
+            total_rows INTEGER DEFAULT 0,
+            processed INTEGER DEFAULT 0,
+            total_companies INTEGER DEFAULT 0,
+            emails_found INTEGER DEFAULT 0,
+            output_filename TEXT,
+            output_format TEXT,
+            error TEXT,
+            stats TEXT,
+            created_at REAL,
+            updated_at REAL
+        )''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS website_cache (
+            company_key TEXT PRIMARY KEY,
+            website TEXT,
+            checked_at REAL NOT NULL
+        )''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS page_cache (
+            url TEXT PRIMARY KEY,
+            final_url TEXT,
+            status INTEGER,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            emails TEXT,
+            links TEXT,
+            fetched_at REAL NOT NULL
+        )''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS search_cache (
+            engine TEXT NOT NULL,
+            query TEXT NOT NULL,
+            links TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (engine, query)
+        )''')
+        # Older stores predate output format choice and link discovery
+        job_columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+        if 'output_format' not in job_columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN output_format TEXT')
+        page_columns = [row[1] for row in conn.execute('PRAGMA table_info(page_cache)')]
+        if 'links' not in page_columns:
+            conn.execute('ALTER TABLE page_cache ADD COLUMN links TEXT')
+
+def count_stat(name, amount=1):
+    """Add to a counter in the stats of the job running in the current context, if any"""
+    stats = job_stats.get()
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + amount
+
+def get_cached_website(company_keys):
+    """Return (hit, website) for a company known by any of company_keys; website is None for a cached negative result"""
+    placeholders = ', '.join('?' * len(company_keys))
+    with closing(get_db()) as conn:
+        rows = conn.execute(
+            f'SELECT website, checked_at FROM website_cache WHERE company_key IN ({placeholders})', company_keys
+        ).fetchall()
+    hit, website = False, None
+    for row in rows:
+        ttl = WEBSITE_CACHE_TTL if row['website'] else WEBSITE_CACHE_NEGATIVE_TTL
+        if time.time() - row['checked_at'] > ttl:
+            continue
+        # A website found under any spelling beats "nothing found" under another
+        hit, website = True, website or row['website']
+    return hit, website
+
+def store_cached_website(company_keys, website):
+    """Remember the website found for a company under each of its keys (None records that nothing was found)"""
+    now = time.time()
+    with closing(get_db()) as conn, conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO website_cache (company_key, website, checked_at) VALUES (?, ?, ?)',
+            [(company_key, website, now) for company_key in company_keys]
+        )
+
+def get_cached_page(url):
+    """Return the cached fetch result for a URL as a dict, or None"""
+    with closing(get_db()) as conn:
+        row = conn.execute('SELECT * FROM page_cache WHERE url = ?', (url,)).fetchone()
+    if row is None:
+        return None
+    page = dict(row)
+    page['emails'] = json.loads(page['emails']) if page['emails'] else []
+    page['links'] = json.loads(page['links']) if page['links'] else None
+    return page
+
+def store_cached_page(url, final_url, status, etag, last_modified, content_hash, emails, links=None):
+    """Remember what a URL returned and which emails (and internal links) were extracted from it"""
+    with closing(get_db()) as conn, conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO page_cache '
+            '(url, final_url, status, etag, last_modified, content_hash, emails, links, fetched_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (url, final_url, status, etag, last_modified, content_hash, json.dumps(emails),
+             json.dumps(links) if links is not None else None, time.time())
+        )
+
+def touch_cached_page(url):
+    """Mark a cached page as revalidated now"""
+    with closing(get_db()) as conn, conn:
+        conn.execute('UPDATE page_cache SET fetched_at = ? WHERE url = ?', (time.time(), url))
+
+def get_cached_search(engine, query):
+    """Return the cached result links for a search query, or None if missing or stale"""
+    with closing(get_db()) as conn:
+        row = conn.execute(
+            'SELECT links, fetched_at FROM search_cache WHERE engine = ? AND query = ?', (engine, query)
+        ).fetchone()
+    if row is None or time.time() - row['fetched_at'] > SEARCH_CACHE_TTL:
+        return None
+    return json.loads(row['links'])
+
+def store_cached_search(engine, query, links):
+    """Remember the result links a search engine gave for a query"""
+    with closing(get_db()) as conn, conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO search_cache (engine, query, links, fetched_at) VALUES (?, ?, ?, ?)',
+            (engine, query, json.dumps(links), time.time())
+        )
+
+_fetch_loop = None
+_fetch_loop_lock = threading.Lock()
+
+def get_fetch_loop():
+    """Return the background event loop that runs all network I/O, starting it on first use"""
+    global _fetch_loop
+    with _fetch_loop_lock:
+        if _fetch_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='fetch-loop', daemon=True).start()
+            _fetch_loop = loop
+        return _fetch_loop
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the fetch loop and block until it finishes, cancelling it if we give up"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_fetch_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+class BoundedDict(collections.OrderedDict):
+    """Dict that forgets its least recently written keys once it holds more than maxsize"""
+    
+    def __init__(self, maxsize=HOST_STATE_LIMIT):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+# getaddrinfo errors meaning the name has no records (NXDOMAIN), as opposed to a lookup that failed
+DNS_NOT_FOUND_ERRORS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+class CachingResolver(AbstractResolver):
+    """Process-wide DNS cache shared by every HTTP pool, remembering dead hosts too.
+    
+    Lookups for the same host share one query, answers are kept for
+    DNS_CACHE_TTL seconds, and a host the DNS says doesn't exist is
+    remembered as dead for DNS_NEGATIVE_TTL seconds so later probes for it
+    fail fast. Timeouts and temporary failures are never cached.
+    """
+    
+    def __init__(self, ttl=DNS_CACHE_TTL, negative_ttl=DNS_NEGATIVE_TTL, timeout=DNS_TIMEOUT):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self._resolver = None
+        self._answers = BoundedDict()
+        self._dead = BoundedDict()
+        self._inflight = {}
+    
+    def is_dead(self, host):
+        """True if the host recently failed to resolve"""
+        expires = self._dead.get(host)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._dead[host]
+            return False
+        return True
+    
+    async def _lookup(self, host, port, family):
+        if self._resolver is None:
+            self._resolver = aiohttp.DefaultResolver()
+        try:
+            addresses = await asyncio.wait_for(self._resolver.resolve(host, port, family=family), self.timeout)
+        except asyncio.TimeoutError as e:
+            # A slow resolver says nothing about the host, so only this request fails
+            raise socket.gaierror(socket.EAI_AGAIN, f"Timed out resolving {host}") from e
+        except socket.gaierror as e:
+            if e.errno in DNS_NOT_FOUND_ERRORS:
+                self._dead[host] = time.monotonic() + self.negative_ttl
+                count_stat('dns_dead_hosts')
+            raise
+        self._answers[(host, port, family)] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+    
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        if self.is_dead(host):
+            count_stat('dns_cache_hits')
+            raise socket.gaierror(socket.EAI_NONAME, f"Cannot resolve {host}: known dead")
+        key = (host, port, family)
+        cached = self._answers.get(key)
+        if cached and cached[0] > time.monotonic():
+            count_stat('dns_cache_hits')
+            return cached[1]
+        
+        count_stat('dns_lookups')
+        if key not in self._inflight:
+            self._inflight[key] = asyncio.ensure_future(self._lookup(host, port, family))
+            self._inflight[key].add_done_callback(lambda done: self._inflight.pop(key, None))
+        return await asyncio.shield(self._inflight[key])
+    
+    async def resolves(self, host):
+        """True if the host has an address record"""
+        try:
+            await self.resolve(host, 443, family=socket.AF_UNSPEC)
+            return True
+        except OSError:
+            return False
+    
+    async def resolve_many(self, hosts):
+        """Resolve hosts concurrently; returns {host: True if it resolves}"""
+        hosts = list(dict.fromkeys(hosts))
+        results = await asyncio.gather(*(self.resolves(host) for host in hosts))
+        return dict(zip(hosts, results))
+    
+    async def close(self):
+        # Pools share this resolver, so closing one connector must not close it
+        pass
+
+dns_resolver = CachingResolver()
+
+class HttpPool:
+    """Shared keep-alive aiohttp session with connection limits and reuse counters"""
+    
+    def __init__(self, name, limit, limit_per_host, keepalive_timeout=HTTP_KEEPALIVE):
+        self.name = name
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.counters = {'requests': 0, 'connections_created': 0, 'connections_reused': 0}
+        self._session = None
+    
+    async def _on_request_start(self, session, context, params):
+        self.counters['requests'] += 1
+    
+    async def _on_connection_create_end(self, session, context, params):
+        self.counters['connections_created'] += 1
+    
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.counters['connections_reused'] += 1
+    
+    def session(self):
+        """Return the pooled session, creating it on first use (must run on the fetch loop)"""
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_connection_create_end.append(self._on_connection_create_end)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                resolver=dns_resolver,
+                use_dns_cache=False,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+        return self._session
+    
+    def stats(self):
+        """Counters for this pool; every reused connection is a TCP/TLS handshake avoided"""
+        return {
+            **self.counters,
+            'handshakes_avoided': self.counters['connections_reused'],
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+        }
+
+http_pools = {
+    'search': HttpPool('search', limit=HTTP_POOL_SIZE, limit_per_host=SEARCH_WORKERS),
+    'pages': HttpPool('pages', limit=HTTP_POOL_SIZE, limit_per_host=HTTP_PER_HOST_LIMIT),
+}
+
+def http_pool_stats():
+    """Snapshot of the counters of every shared HTTP pool"""
+    return {name: pool.stats() for name, pool in http_pools.items()}
+
+def http_pool_usage(before):
+    """Counter deltas for every shared HTTP pool since an earlier http_pool_stats() snapshot"""
+    usage = {}
+    for name, counters in http_pool_stats().items():
+        usage[name] = {
+            key: counters[key] - before[name][key]
+            for key in ('requests', 'connections_created', 'connections_reused', 'handshakes_avoided')
+        }
+    return usage
+
+# Slots only exist while some request holds or waits for one
+_host_limits = {}
+_host_slot_users = collections.Counter()
+
+def url_host(url):
+    """Lower-cased host part of a URL"""
+    return url.split('/')[2].lower() if len(url.split('/')) > 2 else ''
+
+def is_loopback_url(url):
+    """True for URLs that point back at this machine, like the local fixture sites"""
+    return urlparse(url).hostname in ('localhost', '127.0.0.1', '::1')
+
+@asynccontextmanager
+async def host_slot(url):
+    """Hold one of the HTTP_PER_HOST_LIMIT fetch slots for the URL's host (fetch loop only)"""
+    host = url_host(url)
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    _host_slot_users[host] += 1
+    try:
+        async with _host_limits[host]:
+            yield
+    finally:
+        _host_slot_users[host] -= 1
+        if not _host_slot_users[host]:
+            del _host_slot_users[host]
+            del _host_limits[host]
+
+class LatencyTracker:
+    """Recent request durations per host and overall, turned into request timeouts.
+    
+    A host's timeout is LATENCY_TIMEOUT_FACTOR times its 95th-percentile
+    duration once it has LATENCY_MIN_SAMPLES samples, otherwise the same
+    over all hosts, otherwise the caller's default; always clamped between
+    MIN_REQUEST_TIMEOUT and MAX_REQUEST_TIMEOUT. Timed-out requests count
+    as samples of the time they were given, so slow hosts earn more.
+    """
+    
+    def __init__(self, window=LATENCY_WINDOW, min_samples=LATENCY_MIN_SAMPLES, factor=LATENCY_TIMEOUT_FACTOR,
+                 min_timeout=MIN_REQUEST_TIMEOUT, max_timeout=MAX_REQUEST_TIMEOUT):
+        self.window = window
+        self.min_samples = min_samples
+        self.factor = factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._hosts = BoundedDict()
+        self._overall = collections.deque(maxlen=window * 20)
+    
+    def record(self, host, seconds):
+        samples = self._hosts.get(host) or collections.deque(maxlen=self.window)
+        samples.append(seconds)
+        # Writing the samples back marks the host as recently used
+        self._hosts[host] = samples
+        self._overall.append(seconds)
+    
+    @staticmethod
+    def percentile(samples, fraction):
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+    
+    def timeout_for(self, host, default):
+        """Timeout (seconds) for the next request to a host"""
+        for samples in (self._hosts.get(host, ()), self._overall):
+            if len(samples) >= self.min_samples:
+                timeout = self.factor * self.percentile(samples, 0.95)
+                return min(max(timeout, self.min_timeout), self.max_timeout)
+        return default
+    
+    def stats(self):
+        """Overall latency percentiles, in seconds"""
+        if not self._overall:
+            return {'samples': 0}
+        return {
+            'samples': len(self._overall),
+            'p50_s': round(self.percentile(self._overall, 0.5), 3),
+            'p95_s': round(self.percentile(self._overall, 0.95), 3),
+        }
+
+latency = LatencyTracker()
+
+def request_timeout(url, default):
+    """Adaptive timeout for a request, cut short by the current company's deadline.
+    
+    Returns (timeout, clamped); clamped is True when the deadline shortened
+    the timeout, so timing out says nothing about the host.
+    """
+    timeout = latency.timeout_for(url_host(url), default)
+    deadline = company_deadline.get()
+    if deadline is not None and deadline - time.monotonic() < timeout:
+        return max(deadline - time.monotonic(), 0.1), True
+    return timeout, False
+
+class HostCircuitBreaker:
+    """Stops sending requests to a host once it keeps timing out, refusing connections or erroring.
+    
+    After BREAKER_THRESHOLD failures in a row the host is skipped for
+    BREAKER_COOLDOWN seconds. Once that passes one more request is let
+    through, and a single further failure trips it again.
+    """
+    
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = BoundedDict()
+        self._failed_seconds = BoundedDict()
+        self._open_until = BoundedDict()
+    
+    def is_open(self, host):
+        """True while requests to the host should be skipped"""
+        open_until = self._open_until.get(host)
+        if open_until is None:
+            return False
+        if open_until < time.monotonic():
+            del self._open_until[host]
+            self._failures[host] = self.threshold - 1
+            return False
+        return True
+    
+    def skip(self, url):
+        """True if the URL's host is tripped, counting the skipped request and the time it would have cost"""
+        host = url_host(url)
+        if not self.is_open(host):
+            return False
+        count_stat('breaker_skips')
+        count_stat('breaker_time_saved_s', self._failed_seconds.get(host, 0) / max(self._failures.get(host, 1), 1))
+        return True
+    
+    def record_success(self, host):
+        # The host answered, so it is up: close the breaker even if it tripped
+        # while this request was in flight
+        self._open_until.pop(host, None)
+        self._failures.pop(host, None)
+        self._failed_seconds.pop(host, None)
+    
+    def record_failure(self, host, elapsed):
+        self._failures[host] = self._failures.get(host, 0) + 1
+        self._failed_seconds[host] = self._failed_seconds.get(host, 0) + elapsed
+        if self._failures[host] >= self.threshold and host not in self._open_until:
+            self._open_until[host] = time.monotonic() + self.cooldown
+            count_stat('breaker_tripped_hosts')
+            logger.info(f"Circuit breaker tripped for {host} after {self._failures[host]} failures")
+
+host_breaker = HostCircuitBreaker()
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst` (fetch loop only)"""
+    
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            delay = (1 - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+
+class PolitenessScheduler:
+    """Spaces out requests per host and per search engine instead of sleeping globally.
+    
+    Each website host gets at least HOST_MIN_DELAY seconds between request
+    starts, or its robots.txt Crawl-delay if that is longer. Each search
+    engine has its own token bucket, sized by its provider. Requests to
+    different hosts never wait on each other; loopback hosts never wait.
+    """
+    
+    def __init__(self, min_delay=HOST_MIN_DELAY, search_rate=SEARCH_RATE, search_burst=SEARCH_BURST):
+        self.min_delay = min_delay
+        self.search_rate = search_rate
+        self.search_burst = search_burst
+        self._next_start = {}
+        self._sweep_size = HOST_STATE_LIMIT
+        self._crawl_delays = BoundedDict()
+        self._robots_fetches = {}
+        self._buckets = {}
+    
+    async def _fetch_crawl_delay(self, url):
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        try:
+            async with client_session() as http:
+                async with http.get(robots_url, timeout=aiohttp.ClientTimeout(total=ROBOTS_TIMEOUT)) as response:
+                    if response.status != 200:
+                        return None
+                    robots_txt = await response.text(errors='replace')
+            parser = RobotFileParser()
+            parser.parse(robots_txt.splitlines())
+            crawl_delay = parser.crawl_delay('*')
+            if crawl_delay:
+                logger.info(f"robots.txt for {parsed.netloc} sets Crawl-delay {crawl_delay}")
+            return min(float(crawl_delay), MAX_CRAWL_DELAY) if crawl_delay else None
+        except Exception as e:
+            logger.info(f"Could not read {robots_url}: {str(e)}")
+            return None
+    
+    async def host_delay(self, url):
+        """Minimum gap between requests to the URL's host"""
+        host = url_host(url)
+        if host in self._crawl_delays:
+            crawl_delay = self._crawl_delays[host]
+        else:
+            if host not in self._robots_fetches:
+                # Share one robots.txt fetch between all requests waiting on a new host
+                fetch = asyncio.ensure_future(self._fetch_crawl_delay(url))
+                self._robots_fetches[host] = fetch
+                fetch.add_done_callback(lambda done: self._store_crawl_delay(host, done))
+            crawl_delay = await asyncio.shield(self._robots_fetches[host])
+        return max(self.min_delay, crawl_delay or 0)
+    
+    def _store_crawl_delay(self, host, fetch):
+        # Keep the delay itself; the finished future is dropped with its response
+        del self._robots_fetches[host]
+        if not fetch.cancelled() and fetch.exception() is None:
+            self._crawl_delays[host] = fetch.result()
+    
+    def _sweep_next_start(self, now):
+        # A start time in the past no longer delays anything, so it can go
+        if len(self._next_start) > self._sweep_size:
+            self._next_start = {host: start for host, start in self._next_start.items() if start > now}
+            self._sweep_size = max(HOST_STATE_LIMIT, 2 * len(self._next_start))
+    
+    async def wait_for_host(self, url):
+        """Wait for this request's turn on its host"""
+        if is_loopback_url(url):
+            # Our own fixture sites need neither spacing nor robots.txt
+            return
+        delay = await self.host_delay(url)
+        host = url_host(url)
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, 0))
+        self._next_start[host] = start + delay
+        self._sweep_next_start(now)
+        if start > now:
+            count_stat('politeness_wait_s', round(start - now, 3))
+            await asyncio.sleep(start - now)
+    
+    async def acquire_search(self, engine, rate=None, burst=None):
+        """Take a token from the search engine's bucket, waiting if it is empty"""
+        if engine not in self._buckets:
+            self._buckets[engine] = TokenBucket(rate or self.search_rate, burst or self.search_burst)
+        waited = await self._buckets[engine].acquire()
+        if waited:
+            count_stat('politeness_wait_s', round(waited, 3))
+
+politeness = PolitenessScheduler()
+
+@asynccontextmanager
+async def client_session(session=None, pool='pages'):
+    """Use the caller's aiohttp session, or the shared pooled session for this kind of traffic"""
+    yield session if session is not None else http_pools[pool].session()
+
+def extract_emails(text, start=0, end=None):
+    """Find the same addresses as EMAIL_PATTERN.findall, but only run the regex next to '@' signs.
+    
+    Each search is confined to the window an RFC-sized address around one
+    '@' could occupy, so scripts, styles and markup far from any '@' are
+    never scanned by the regex. Addresses in mailto: links are found the
+    same way since they contain an '@' too.
+    """
+    if end is None:
+        end = len(text)
+    matches = []
+    last_end = start
+    previous_at = start - 1
+    at = text.find('@', start, end)
+    while at != -1:
+        next_at = text.find('@', at + 1, end)
+        # Cheap reject for CSS at-rules, JSON-LD keys and social handles
+        if at == start or at + 1 >= end or text[at - 1] not in LOCAL_PART_CHARS or text[at + 1] not in DOMAIN_CHARS:
+            previous_at = at
+            at = next_at
+            continue
+        # Only this '@' lies inside the window, and findall never overlaps matches
+        window_start = max(last_end, previous_at + 1, at - MAX_LOCAL_PART_LENGTH)
+        window_end = min(next_at if next_at != -1 else end, at + MAX_DOMAIN_LENGTH + 2)
+        match = EMAIL_PATTERN.search(text, window_start, window_end)
+        if match:
+            matches.append(match.group())
+            last_end = match.end()
+        previous_at = at
+        at = next_at
+    return matches
+
+def decode_cfemail(encoded):
+    """Decode the hex string Cloudflare's email protection puts in data-cfemail"""
+    try:
+        key = int(encoded[:2], 16)
+        return ''.join(chr(int(encoded[i:i + 2], 16) ^ key) for i in range(2, len(encoded) - 1, 2))
+    except ValueError:
+        return ''
+
+def deobfuscate_email(local_part, domain):
+    """Rebuild 'info', 'brand [dot] com' into info@brand.com"""
+    domain = DOT_TOKEN_PATTERN.sub('.', domain)
+    return f"{local_part}@{''.join(domain.split())}"
+
+def structured_email_spans(lowered):
+    """Merged (start, end) windows around every structured-email marker in lower-cased text"""
+    anchors = []
+    for marker in STRUCTURED_EMAIL_MARKERS:
+        position = lowered.find(marker)
+        while position != -1:
+            anchors.append(position)
+            position = lowered.find(marker, position + len(marker))
+    spans = []
+    for position in sorted(anchors):
+        start = max(position - STRUCTURED_EMAIL_WINDOW, 0)
+        end = position + STRUCTURED_EMAIL_WINDOW
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return spans
+
+def extract_structured_emails(text):
+    """Emails the plain pattern can't see in raw HTML.
+    
+    Covers mailto: links, schema.org email fields (JSON-LD ContactPoint or
+    Organization and itemprop microdata), HTML entity and percent
+    encoding, Cloudflare data-cfemail protection and "info [at] brand
+    [dot] com" style obfuscation. Like extract_emails(), only the text
+    around a marker is ever decoded.
+    """
+    lowered = text.lower()
+    candidates = []
+    for start, end in structured_email_spans(lowered):
+        window = text[start:end]
+        window_lowered = lowered[start:end]
+        for href in MAILTO_PATTERN.findall(window):
+            candidates.append(unquote(html.unescape(href)))
+        for encoded in CFEMAIL_PATTERN.findall(window):
+            candidates.append(decode_cfemail(encoded))
+        for value in SCHEMA_EMAIL_PATTERN.findall(window):
+            try:
+                value = json.loads(f'"{value}"')
+            except ValueError:
+                pass
+            candidates.append(html.unescape(value))
+        for value in ITEMPROP_EMAIL_PATTERN.findall(window):
+            candidates.append(html.unescape(''.join(value)))
+        for local_part, domain in BRACKETED_EMAIL_PATTERN.findall(window):
+            candidates.append(deobfuscate_email(local_part, domain))
+        if '&#' in window or '&commat' in window_lowered:
+            candidates.append(html.unescape(window))
+        if '%40' in window_lowered:
+            candidates.append(unquote(window))
+    
+    emails = set()
+    for candidate in candidates:
+        emails.update(extract_emails(candidate))
+    return emails
+
+def filter_emails(emails, url):
+    """Drop placeholder and no-reply addresses from a set of matches"""
+    website_domain = url_host(url)
+    filtered_emails = []
+    for email in emails:
+        email_lower = email.lower()
+        # One pass of a single compiled pattern instead of a substring test per blacklist entry
+        if not EMAIL_BLACKLIST.search(email_lower):
+            # Check if email domain matches or is related to the website domain
+            email_domain = email_lower.split('@')[1] if '@' in email_lower else ''
+            
+            # Accept emails that are from the same domain or look legitimate
+            if email_domain and (
+                email_domain in website_domain or 
+                website_domain in email_domain or
+                len(email_domain.split('.')) >= 2  # Has proper domain structure
+            ):
+                filtered_emails.append(email)
+    
+    return list(set(filtered_emails))
+
+def is_html_response(response):
+    """Judge from the headers alone whether a response is worth scanning for emails.
+    
+    Only HTML_CONTENT_TYPES pass; other text types such as text/css,
+    text/javascript and text/csv are skipped like images. A response
+    without a Content-Type is scanned.
+    """
+    content_type = response.headers.get('Content-Type')
+    if not content_type:
+        return True
+    return response.content_type in HTML_CONTENT_TYPES
+
+def scan_boundary(text):
+    """Index just past the last character that can't be part of an email, so no match is cut in two"""
+    return max(text.rfind(delimiter) for delimiter in EMAIL_DELIMITERS) + 1
+
+async def read_page_stream(response, url, keep_text=False):
+    """Read a response body in chunks, scanning for emails as it arrives.
+    
+    Stops after MAX_PAGE_BYTES, or once PAGE_EMAIL_LIMIT usable emails
+    have been found. The decoded text is only kept when keep_text is set.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    hasher = hashlib.sha256()
+    found = set()
+    structured = set()
+    emails = []
+    parts = []
+    carry = ''
+    recent = ''
+    bytes_read = 0
+    truncated = False
+    
+    def scan(region):
+        nonlocal recent, emails
+        new_matches = set(extract_emails(region))
+        # Structured forms can span the previous region's tail, e.g. "info&#64;" + "brand.com"
+        window = recent + region
+        recent = window[-STRUCTURED_EMAIL_WINDOW:]
+        decoded = extract_structured_emails(window) - found - new_matches
+        structured.update(decoded)
+        new_matches = (new_matches | decoded) - found
+        if new_matches:
+            found.update(new_matches)
+            emails = filter_emails(found, url)
+    
+    async for chunk in response.content.iter_chunked(PAGE_CHUNK_SIZE):
+        bytes_read += len(chunk)
+        hasher.update(chunk)
+        text = decoder.decode(chunk)
+        if keep_text:
+            parts.append(text)
+        
+        # Only scan up to the last delimiter; the tail may be the start of an email
+        buffer = carry + text
+        cut = scan_boundary(buffer)
+        if len(buffer) - cut > MAX_EMAIL_LENGTH:
+            cut = len(buffer) - MAX_EMAIL_LENGTH
+        scan(buffer[:cut])
+        carry = buffer[cut:]
+        
+        if len(emails) >= PAGE_EMAIL_LIMIT:
+            truncated = True
+            break
+        if bytes_read >= MAX_PAGE_BYTES:
+            truncated = True
+            logger.info(f"Stopped reading {url} after {bytes_read} bytes")
+            break
+    
+    if not truncated:
+        carry += decoder.decode(b'', final=True)
+    if carry:
+        scan(carry)
+    
+    structured_kept = structured.intersection(emails)
+    if structured_kept:
+        count_stat('structured_emails_found', len(structured_kept))
+    
+    return {
+        'emails': emails,
+        'text': ''.join(parts) if keep_text else None,
+        'content_hash': hasher.hexdigest(),
+        'truncated': truncated,
+    }
+
+async def call_page_cache(func, *args):
+    """Run a page cache read or write off the event loop; if the cache fails, only the cache is lost"""
+    try:
+        return await asyncio.to_thread(func, *args)
+    except Exception as e:
+        logger.error(f"Page cache {func.__name__} failed for {args[0]}: {str(e)}")
+        return None
+
+async def fetch_page_async(url, timeout=None, session=None, want_links=False):
+    """Fetch a page and extract its emails (and internal links if asked), revalidating cached results.
+    
+    Without an explicit timeout one is picked from the host's observed latency.
+    Returns a dict with 'emails' and 'links'; links is None unless want_links is set.
+    """
+    page = {'emails': [], 'links': None}
+    if dns_resolver.is_dead(urlparse(url).hostname):
+        count_stat('dead_host_skips')
+        return page
+    if host_breaker.skip(url):
+        return page
+    host = url_host(url)
+    started = None
+    clamped = False
     try:
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -41,52 +1096,352 @@ def find_emails_on_page(url, timeout=15):
             'Connection': 'keep-alive',
         }
         
-        response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-        response.raise_for_status()
-        
-        # Get text content
-        text_content = response.text.lower()
-        
-        # Find emails in the HTML content
-        emails = set(EMAIL_PATTERN.findall(response.text))
-        
-        # Filter out common false positives and improve filtering
-        filtered_emails = []
-        for email in emails:
-            email_lower = email.lower()
-            # More comprehensive filtering
-            if not any(x in email_lower for x in [
-                'example.com', 'test.com', 'placeholder', 'yoursite', 'yourdomain',
-                'sampleemail', 'noreply', 'no-reply', 'donotreply', 'do-not-reply',
-                'admin@admin', 'test@test', 'user@user', 'email@email',
-                'support@example', 'info@example', 'contact@example'
-            ]):
-                # Check if email domain matches or is related to the website domain
-                email_domain = email_lower.split('@')[1] if '@' in email_lower else ''
-                website_domain = url.split('/')[2].lower() if len(url.split('/')) > 2 else ''
+        cached = await call_page_cache(get_cached_page, url)
+        if cached and cached['status'] in (404, 410) and time.time() - cached['fetched_at'] < PAGE_CACHE_MISSING_TTL:
+            count_stat('page_cache_hits')
+            return page
+        # A cached copy without links can't answer a link request, so fetch it in full
+        revalidate = cached and (cached['links'] is not None or not want_links)
+        if revalidate and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if revalidate and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        async with client_session(session) as http, host_slot(url):
+            # The host may have tripped while this request waited for a slot
+            if host_breaker.skip(url):
+                return page
+            await politeness.wait_for_host(url)
+            if timeout is None:
+                timeout, clamped = request_timeout(url, 15)
+            started = time.monotonic()
+            async with http.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout),
+                                allow_redirects=True) as response:
+                if response.status >= 500:
+                    host_breaker.record_failure(host, time.monotonic() - started)
+                else:
+                    host_breaker.record_success(host)
+                # Not modified: skip the body and the email scan entirely
+                if response.status == 304 and cached:
+                    count_stat('page_cache_hits')
+                    await call_page_cache(touch_cached_page, url)
+                    return {'emails': cached['emails'], 'links': cached['links'] if want_links else None}
+                
+                if response.status in (404, 410):
+                    await call_page_cache(store_cached_page, url, str(response.url), response.status,
+                                          None, None, None, [], None)
+                response.raise_for_status()
+                if not is_html_response(response):
+                    count_stat('non_html_skipped')
+                    logger.info(f"Skipping {url}: content type {response.content_type}")
+                    return page
                 
-                # Accept emails that are from the same domain or look legitimate
-                if email_domain and (
-                    email_domain in website_domain or 
-                    website_domain in email_domain or
-                    len(email_domain.split('.')) >= 2  # Has proper domain structure
-                ):
-                    filtered_emails.append(email)
+                stream = await read_page_stream(response, url, keep_text=want_links)
+                latency.record(host, time.monotonic() - started)
+                final_url = str(response.url)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                status = response.status
         
-        return list(set(filtered_emails))
+        if stream['truncated']:
+            count_stat('pages_truncated')
+        emails = stream['emails']
+        unchanged = cached and cached['content_hash'] == stream['content_hash']
+        count_stat('page_cache_hits' if unchanged else 'page_cache_misses')
+        
+        links = cached['links'] if unchanged else None
+        if want_links and links is None:
+            links = extract_internal_links(stream['text'], final_url)
+        
+        content_hash = stream['content_hash']
+        await call_page_cache(store_cached_page, url, final_url, status, etag, last_modified,
+                              content_hash, emails, links)
+        return {'emails': emails, 'links': links if want_links else None}
     
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
+        if clamped:
+            # Cut short by the company's deadline, not a slow host: no sample, no breaker strike
+            logger.error(f"Timeout fetching {url} (company deadline reached)")
+            return page
         logger.error(f"Timeout fetching {url}")
-        return []
-    except requests.exceptions.RequestException as e:
+        if started is not None:
+            latency.record(host, time.monotonic() - started)
+            host_breaker.record_failure(host, time.monotonic() - started)
+        return page
+    except aiohttp.ClientError as e:
         logger.error(f"Request error fetching {url}: {str(e)}")
-        return []
+        if started is not None and isinstance(e, aiohttp.ClientConnectionError):
+            host_breaker.record_failure(host, time.monotonic() - started)
+        return page
     except Exception as e:
         logger.error(f"Error fetching {url}: {str(e)}")
+        return page
+
+async def find_emails_on_page_async(url, timeout=None, session=None):
+    """Find email addresses on a given webpage without blocking the event loop"""
+    page = await fetch_page_async(url, timeout=timeout, session=session)
+    return page['emails']
+
+def find_emails_on_page(url, timeout=None):
+    """Find email addresses on a given webpage (blocking wrapper)"""
+    return run_sync(find_emails_on_page_async(url, timeout=timeout))
+
+def iter_link_hrefs(content, parser=None):
+    """Yield the href of every <a> tag in an HTML document without building a full tree.
+    
+    Uses lxml's streaming parser (or selectolax) when installed and a
+    byte-level regex scan otherwise. Entities in the href are decoded as a tree parser would.
+    """
+    parser = parser or LINK_PARSER
+    if parser == 'selectolax':
+        for node in SelectolaxParser(content).css('a[href]'):
+            yield node.attributes.get('href') or ''
+    elif parser == 'lxml':
+        events = lxml_etree.iterparse(io.BytesIO(content), events=('start',), tag='a', html=True,
+                                      recover=True, no_network=True)
+        for _, element in events:
+            yield element.get('href') or ''
+            element.clear()
+    else:
+        for match in LINK_HREF_PATTERN.finditer(content):
+            href = match.group(1) or match.group(2) or match.group(3) or b''
+            yield html.unescape(href.decode('utf-8', errors='replace'))
+
+def iter_links(content, parser=None):
+    """Yield (href, anchor text) for every <a> tag with an href, with the same parsers as iter_link_hrefs()"""
+    parser = parser or LINK_PARSER
+    if parser == 'selectolax':
+        for node in SelectolaxParser(content).css('a[href]'):
+            yield node.attributes.get('href') or '', node.text(separator=' ')
+    elif parser == 'lxml':
+        events = lxml_etree.iterparse(io.BytesIO(content), events=('end',), tag='a', html=True,
+                                      recover=True, no_network=True, encoding='utf-8')
+        for _, element in events:
+            href = element.get('href')
+            if href is not None:
+                yield href, ' '.join(element.itertext())
+            element.clear()
+    else:
+        for match in LINK_HREF_PATTERN.finditer(content):
+            href = match.group(1) or match.group(2) or match.group(3) or b''
+            text = LINK_TEXT_PATTERN.match(content, match.end())
+            text = TAG_PATTERN.sub(b' ', text.group(1)) if text else b''
+            yield (html.unescape(href.decode('utf-8', errors='replace')),
+                   html.unescape(text.decode('utf-8', errors='replace')))
+
+def parse_duckduckgo_links(content):
+    """Candidate website links from a DuckDuckGo Lite results page, in result order"""
+    links = []
+    for href in iter_link_hrefs(content):
+        if href and href.startswith('http') and not any(x in href.lower() for x in ['duckduckgo.com', 'google.com', 'bing.com', 'yahoo.com', 'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com']):
+            # Validate it looks like a real website
+            domain = href.split('/')[2] if len(href.split('/')) > 2 else ''
+            if '.' in domain and len(domain) > 3 and href not in links:
+                links.append(href)
+    return links
+
+def parse_google_links(content):
+    """Candidate website links from a Google results page, in result order"""
+    links = []
+    for href in iter_link_hrefs(content):
+        if '/url?q=' in href:
+            # Extract actual URL from Google redirect
+            actual_url = href.split('/url?q=')[1].split('&')[0]
+            if actual_url.startswith('http') and not any(x in actual_url.lower() for x in ['google.com', 'facebook.com', 'twitter.com', 'linkedin.com']):
+                if actual_url not in links:
+                    links.append(actual_url)
+    return links
+
+class SearchProvider:
+    """A search backend that turns a query into candidate website links.
+    
+    Each provider declares its own request rate (`rate` per second with
+    bursts of `burst`) and how many of its requests may be in flight at
+    once (`concurrency`). Subclasses implement fetch_links().
+    """
+    name = None
+    rate = SEARCH_RATE
+    burst = SEARCH_BURST
+    concurrency = SEARCH_WORKERS
+    timeout = 15
+    
+    def __init__(self):
+        self._limit = None
+    
+    def limit(self):
+        """Semaphore capping this provider's in-flight requests (fetch loop only)"""
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        return self._limit
+    
+    async def fetch_links(self, query, session=None):
+        """Candidate links for a query in result order, or None if the provider failed to answer"""
+        raise NotImplementedError
+
+class HtmlSearchProvider(SearchProvider):
+    """Provider that scrapes an HTML results page"""
+    search_url = None
+    
+    def parse_links(self, content):
+        raise NotImplementedError
+    
+    async def fetch_links(self, query, session=None):
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        host = url_host(self.search_url)
+        timeout, clamped = request_timeout(self.search_url, self.timeout)
+        started = time.monotonic()
+        try:
+            async with client_session(session, pool='search') as http:
+                async with http.get(self.search_url, params={'q': query}, headers=headers,
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status != 200:
+                        logger.info(f"{self.name} returned {response.status} for '{query}'")
+                        return None
+                    content = await response.read()
+        except asyncio.TimeoutError:
+            if not clamped:
+                latency.record(host, time.monotonic() - started)
+            raise
+        latency.record(host, time.monotonic() - started)
+        return self.parse_links(content)
+
+class DuckDuckGoLiteProvider(HtmlSearchProvider):
+    # Use DuckDuckGo Lite for better parsing
+    name = 'duckduckgo'
+    search_url = 'https://lite.duckduckgo.com/lite/'
+    
+    def parse_links(self, content):
+        return parse_duckduckgo_links(content)
+
+class GoogleHtmlProvider(HtmlSearchProvider):
+    name = 'google'
+    search_url = 'https://www.google.com/search'
+    timeout = 10
+    rate = SEARCH_RATE / 2
+    burst = 1
+    concurrency = 2
+    
+    def parse_links(self, content):
+        return parse_google_links(content)
+
+class LocalSearchProvider(SearchProvider):
+    """Offline stand-in that answers from a fixture file or points at the built-in fixture sites.
+    
+    LOCAL_SEARCH_FIXTURES may name a JSON file mapping company names to
+    result links. Any other query gets a link to /fixtures/sites/<slug>/
+    on this app, so a whole /upload job can run without network access.
+    For throughput tests raise HTTP_PER_HOST_LIMIT, since every fixture
+    site shares one host.
+    """
+    name = 'local'
+    rate = 1000.0
+    burst = 1000
+    concurrency = 1000
+    
+    def __init__(self, fixtures_path=LOCAL_SEARCH_FIXTURES, base_url=LOCAL_FIXTURE_URL, latency=LOCAL_SEARCH_LATENCY):
+        super().__init__()
+        self.base_url = base_url.rstrip('/')
+        self.latency = latency
+        self.fixtures = {}
+        if fixtures_path:
+            with open(fixtures_path) as f:
+                self.fixtures = {
+                    ' '.join(name_tokens(clean_company_name(name))): links for name, links in json.load(f).items()
+                }
+    
+    async def fetch_links(self, query, session=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        tokens = [token for token in name_tokens(query) if token not in SEARCH_QUERY_WORDS]
+        if not tokens:
+            return []
+        return self.fixtures.get(' '.join(tokens), [f"{self.base_url}/{'-'.join(tokens)}/"])
+
+SEARCH_PROVIDER_CLASSES = {
+    provider.name: provider for provider in (DuckDuckGoLiteProvider, GoogleHtmlProvider, LocalSearchProvider)
+}
+
+# Words the query variants add around a company name
+SEARCH_QUERY_WORDS = {'website', 'official', 'site', 'company'}
+
+search_providers = [SEARCH_PROVIDER_CLASSES[name.strip()]() for name in SEARCH_PROVIDERS.split(',') if name.strip()]
+
+_inflight_searches = {}
+
+def _forget_search(key, future):
+    _inflight_searches.pop(key, None)
+    if not future.cancelled():
+        # Waiters log the failure; this just stops asyncio reporting it as unretrieved
+        future.exception()
+
+async def _run_search(provider, query, session=None):
+    async with provider.limit():
+        await politeness.acquire_search(provider.name, provider.rate, provider.burst)
+        count_stat('search_queries')
+        links = await provider.fetch_links(query, session=session)
+    
+    if links is not None:
+        await asyncio.to_thread(store_cached_search, provider.name, query, links)
+    return links
+
+async def search_links_async(provider, query, session=None):
+    """Result links for one query from one search provider, served from the query cache when possible.
+    
+    Concurrent requests for the same query share a single provider request.
+    """
+    query_key = ' '.join(query.lower().split())
+    links = await asyncio.to_thread(get_cached_search, provider.name, query_key)
+    if links is not None:
+        count_stat('search_cache_hits')
+        return links
+    
+    key = (provider.name, query_key)
+    future = _inflight_searches.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_run_search(provider, query_key, session))
+        _inflight_searches[key] = future
+        future.add_done_callback(lambda done: _forget_search(key, done))
+    else:
+        count_stat('search_requests_shared')
+    try:
+        return await asyncio.shield(future) or []
+    except Exception as e:
+        logger.error(f"Search attempt failed for query '{query}': {str(e)}")
         return []
 
-def search_company_website(company_name):
-    """Search for company website using multiple search strategies"""
+def name_tokens(clean_name):
+    """Lower-case alphanumeric words of a company name"""
+    return re.findall(r'[a-z0-9]+', clean_name.lower())
+
+def score_search_result(clean_name, url, rank):
+    """Confidence (0-1) that a search result is the company's own website"""
+    if is_loopback_url(url):
+        # Local fixture sites are told apart by their path, not their host
+        label = urlparse(url).path.rstrip('/').rsplit('/', 1)[-1].replace('-', '')
+    else:
+        host = url_host(url).split(':')[0].removeprefix('www.')
+        label = host.rsplit('.', 1)[0].replace('-', '').replace('.', '')
+    tokens = name_tokens(clean_name)
+    squashed = ''.join(tokens)
+    if not squashed or not label:
+        return 0.0
+    
+    if squashed in label:
+        score = 1.0
+    else:
+        significant = [token for token in tokens if len(token) >= 3] or tokens
+        token_share = sum(token in label for token in significant) / len(significant)
+        similarity = difflib.SequenceMatcher(None, squashed, label).ratio()
+        score = max(0.8 * token_share, 0.9 * similarity)
+    
+    # Prefer homepages over deep links, and earlier results over later ones
+    depth = len([part for part in urlparse(url).path.split('/') if part])
+    return max(score - 0.05 * depth - 0.01 * rank, 0.0)
+
+async def search_company_website_async(company_name, session=None):
+    """Search for company website, only trying more query variants while the best match is uncertain"""
     try:
         if not company_name:
             return None
@@ -94,10 +1449,6 @@ def search_company_website(company_name):
         clean_name = clean_company_name(company_name)
         if not clean_name:
             return None
-            
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
         
         # Try multiple search strategies
         search_queries = [
@@ -107,62 +1458,310 @@ def search_company_website(company_name):
             f'{clean_name}'
         ]
         
-        for query in search_queries:
-            try:
-                # Use DuckDuckGo Lite for better parsing
-                search_url = f"https://lite.duckduckgo.com/lite/?q={query}"
-                
-                response = requests.get(search_url, headers=headers, timeout=15)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Look for result links in DuckDuckGo Lite format
-                    links = soup.find_all('a')
-                    
-                    for link in links:
-                        href = link.get('href', '') if hasattr(link, 'get') else ''
-                        if isinstance(href, str) and href and href.startswith('http') and not any(x in href.lower() for x in ['duckduckgo.com', 'google.com', 'bing.com', 'yahoo.com', 'facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com']):
-                            # Validate it looks like a real website
-                            domain = href.split('/')[2] if len(href.split('/')) > 2 else ''
-                            if '.' in domain and len(domain) > 3:
-                                logger.info(f"Found potential website for {clean_name}: {href}")
-                                return href
-                
-                # Small delay between search attempts
-                time.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Search attempt failed for query '{query}': {str(e)}")
-                continue
-        
-        # If no results found, try a simple Google search as fallback
-        try:
-            search_url = f"https://www.google.com/search?q={clean_name}+website"
-            response = requests.get(search_url, headers=headers, timeout=10)
+        primary, fallbacks = search_providers[0], search_providers[1:]
+        best_score, best_url = -1.0, None
+        for position, query in enumerate(search_queries):
+            links = await search_links_async(primary, query, session=session)
+            for rank, href in enumerate(links):
+                score = score_search_result(clean_name, href, rank)
+                if score > best_score:
+                    best_score, best_url = score, href
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for Google result links
-                for link in soup.find_all('a'):
-                    href = link.get('href', '') if hasattr(link, 'get') else ''
-                    if isinstance(href, str) and '/url?q=' in href:
-                        # Extract actual URL from Google redirect
-                        actual_url = href.split('/url?q=')[1].split('&')[0]
-                        if actual_url.startswith('http') and not any(x in actual_url.lower() for x in ['google.com', 'facebook.com', 'twitter.com', 'linkedin.com']):
-                            logger.info(f"Found website via Google for {clean_name}: {actual_url}")
-                            return actual_url
-        except Exception as e:
-            logger.error(f"Google search fallback failed: {str(e)}")
+            if best_score >= SEARCH_CONFIDENCE:
+                count_stat('search_variants_skipped', len(search_queries) - position - 1)
+                break
+        
+        # If no results found, try a simple search on the fallback providers
+        for provider in fallbacks:
+            if best_url is not None:
+                break
+            links = await search_links_async(provider, f'{clean_name} website', session=session)
+            for rank, href in enumerate(links):
+                score = score_search_result(clean_name, href, rank)
+                if score > best_score:
+                    best_score, best_url = score, href
+        
+        if best_url:
+            logger.info(f"Found potential website for {clean_name}: {best_url} (confidence {best_score:.2f})")
+            return best_url
         
         logger.info(f"No website found for {clean_name}")
         return None
         
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         logger.error(f"Error searching for {company_name}: {str(e)}")
         return None
 
-def find_company_email(company_name):
+def search_company_website(company_name):
+    """Search for company website (blocking wrapper)"""
+    return run_sync(search_company_website_async(company_name))
+
+def guess_company_domains(clean_name):
+    """Likely website hostnames for a company, most likely first"""
+    tokens = name_tokens(clean_name)
+    squashed = ''.join(tokens)
+    if len(squashed) < DOMAIN_GUESS_MIN_LENGTH:
+        # Short names like "Joy" own a real domain far too rarely to trust a hit
+        return []
+    labels = []
+    for word in ('boutique', 'shop', 'store'):
+        if not squashed.endswith(word):
+            labels.append(squashed + word)
+    if 'shop' not in squashed:
+        labels.append('shop' + squashed)
+    if len(tokens) == 1:
+        # A bare dictionary word like grace.com almost always belongs to someone else
+        return [f'{label}.com' for label in labels]
+    hosts = [f'{label}.com' for label in [squashed] + labels]
+    hosts += [f'{squashed}.{tld}' for tld in ('net', 'co')]
+    return hosts
+
+def page_names_company(text, clean_name):
+    """True if a page's title or visible text spells out the company name, spacing and punctuation aside"""
+    tokens = name_tokens(clean_name)
+    if not tokens:
+        return False
+    visible = html.unescape(PAGE_MARKUP_PATTERN.sub(' ', text))
+    pattern = r'\b' + r'[\W_]*'.join(map(re.escape, tokens)) + r'\b'
+    return re.search(pattern, visible, re.IGNORECASE) is not None
+
+async def probe_guessed_website(clean_name, host, session=None):
+    """The site's final URL if https://host/ looks like a live storefront of the company's, else None.
+    
+    Only the first DOMAIN_GUESS_MAX_BYTES of the homepage are read. The
+    page has to stay on a matching domain, name the company in its title
+    or text, carry no parking or for-sale markers, and link to at least
+    one other page of its own site.
+    """
+    url = f'https://{host}/'
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    }
+    try:
+        async with client_session(session) as http, host_slot(url):
+            await politeness.wait_for_host(url)
+            async with http.get(url, headers=headers, allow_redirects=True,
+                                timeout=aiohttp.ClientTimeout(total=DOMAIN_GUESS_TIMEOUT)) as response:
+                if response.status >= 400 or not is_html_response(response):
+                    return None
+                final_url = str(response.url)
+                # A redirect to a marketplace means the name is taken by someone else
+                if score_search_result(clean_name, final_url, 0) < SEARCH_CONFIDENCE:
+                    logger.info(f"Guessed domain {host} redirects away to {final_url}")
+                    return None
+                body = b''
+                async for chunk in response.content.iter_chunked(PAGE_CHUNK_SIZE):
+                    body += chunk
+                    if len(body) >= DOMAIN_GUESS_MAX_BYTES:
+                        break
+                text = body.decode(response.charset or 'utf-8', errors='replace')
+    except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+        logger.info(f"Guessed domain {host} did not answer: {str(e)}")
+        return None
+    
+    if PARKED_PAGE_PATTERN.search(text):
+        logger.info(f"Guessed domain {host} is a parked page")
+        return None
+    if not page_names_company(text, clean_name):
+        logger.info(f"Guessed domain {host} does not mention {clean_name}")
+        return None
+    if not extract_internal_links(text, final_url):
+        logger.info(f"Guessed domain {host} has no pages of its own")
+        return None
+    return final_url
+
+async def guess_company_website_async(company_name, session=None):
+    """Try the obvious domains for a company before asking a search engine.
+    
+    All candidates are resolved at once; the ones with DNS records are then
+    probed with a short GET of their homepage, and the most likely one that
+    looks like a real storefront wins. Each probed host also costs a
+    robots.txt request, which the winner's crawl then reuses.
+    """
+    if not DOMAIN_GUESSING or any(provider.name == 'local' for provider in search_providers):
+        return None
+    clean_name = clean_company_name(company_name)
+    if not clean_name:
+        return None
+    
+    hosts = guess_company_domains(clean_name)
+    resolved = await dns_resolver.resolve_many(hosts)
+    live_hosts = [host for host in hosts if resolved[host]]
+    if not live_hosts:
+        return None
+    
+    probes = [asyncio.ensure_future(probe_guessed_website(clean_name, host, session)) for host in live_hosts]
+    try:
+        for probe in probes:
+            website = await probe
+            if website:
+                count_stat('domain_guess_hits')
+                logger.info(f"Guessed website for {company_name}: {website}")
+                return website
+    finally:
+        for probe in probes:
+            probe.cancel()
+    return None
+
+async def resolve_company_website_async(company_name, session=None, aliases=()):
+    """Find a company's website, using the persistent cache and domain guesses before searching.
+    
+    aliases are other keys of the same company (see dedupe_companies); a
+    cached answer under any of them is used, and the result is stored under all.
+    """
+    company_key = normalize_company_name(company_name)
+    if not company_key:
+        return None
+    company_keys = list(dict.fromkeys([company_key, *aliases]))
+    
+    try:
+        hit, website = await asyncio.to_thread(get_cached_website, company_keys)
+    except Exception as e:
+        logger.error(f"Website cache lookup failed for {company_name}: {str(e)}")
+        hit, website = False, None
+    
+    if hit:
+        count_stat('website_cache_hits')
+        logger.info(f"Website cache hit for {company_name}: {website}")
+        return website
+    
+    count_stat('website_cache_misses')
+    website = await guess_company_website_async(company_name, session=session)
+    if website is None:
+        website = await search_company_website_async(company_name, session=session)
+    try:
+        await asyncio.to_thread(store_cached_website, company_keys, website)
+    except Exception as e:
+        logger.error(f"Website cache update failed for {company_name}: {str(e)}")
+    return website
+
+def extract_internal_links(text, base_url):
+    """Return [url, anchor text] pairs for links on a page that stay on the same site.
+    
+    Runs on the fetch loop, so it uses the selective link extractor rather
+    than building a full tree of the page.
+    """
+    site = url_host(base_url).removeprefix('www.')
+    links = []
+    seen = set()
+    for href, anchor_text in iter_links(text.encode('utf-8', errors='replace')):
+        href = href.strip()
+        if not href or href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
+            continue
+        link = urljoin(base_url, href).split('#')[0]
+        if not link.startswith('http') or url_host(link).removeprefix('www.') != site or link in seen:
+            continue
+        seen.add(link)
+        links.append([link, ' '.join(anchor_text.split())[:100]])
+    return links
+
+def contact_link_score(url, text):
+    """How likely a link is to lead to a page with contact details (0 means not at all)"""
+    path = urlparse(url).path.lower()
+    text = text.lower()
+    score = 0
+    for keyword, weight in CONTACT_LINK_KEYWORDS.items():
+        if keyword in path:
+            score += weight
+        if keyword in text:
+            score += weight
+    if score:
+        # Prefer short paths like /pages/contact over deep blog posts that mention "contact"
+        score -= path.count('/') * 0.5
+    return max(score, 0)
+
+def rank_contact_links(links, website):
+    """Internal links ordered by contact-likelihood, best first, excluding the homepage itself"""
+    homepage = website.rstrip('/')
+    scored = []
+    for link, text in links or []:
+        if link.rstrip('/') == homepage:
+            continue
+        score = contact_link_score(link, text)
+        if score > 0:
+            scored.append((score, link))
+    scored.sort(key=lambda item: -item[0])
+    return [link for _, link in scored]
+
+async def first_page_with_emails(urls, session=None):
+    """Probe pages concurrently and return (url, emails) for the first URL in list order that has emails.
+    
+    Probes still running once the answer is known are cancelled.
+    """
+    tasks = [asyncio.ensure_future(find_emails_on_page_async(url, session=session)) for url in urls]
+    try:
+        # Awaiting in list order keeps the winner deterministic however the probes finish
+        for url, task in zip(urls, tasks):
+            emails = await task
+            if emails:
+                return url, emails
+        return None, []
+    finally:
+        cancelled = 0
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+                cancelled += 1
+        if cancelled:
+            count_stat('probes_cancelled', cancelled)
+
+async def find_email_on_website_async(company_name, website, session=None):
+    """Check a company's homepage and common contact pages for an email"""
+    try:
+        async with client_session(session) as http:
+            # Check main page first, collecting its links for contact page discovery
+            homepage = await fetch_page_async(website, session=http, want_links=True)
+            emails = homepage['emails']
+            if emails:
+                logger.info(f"Found email on main page for {company_name}: {emails[0]}")
+                return emails[0], f"Main page: {website}"
+            
+            if dns_resolver.is_dead(urlparse(website).hostname):
+                logger.info(f"Skipping contact pages for {company_name}: {website} does not resolve")
+                return None, f"Website does not resolve: {website}"
+            if host_breaker.is_open(url_host(website)):
+                logger.info(f"Skipping contact pages for {company_name}: {website} keeps failing")
+                return None, f"Website not responding: {website}"
+            
+            if isinstance(website, str):
+                # Follow the homepage's own most contact-like links first
+                discovered = rank_contact_links(homepage['links'], website)[:CONTACT_LINK_CANDIDATES]
+                if discovered:
+                    logger.info(f"Checking {len(discovered)} discovered contact pages on {website}")
+                    contact_url, emails = await first_page_with_emails(discovered, session=http)
+                    if emails:
+                        count_stat('discovered_contact_hits')
+                        logger.info(f"Found email on contact page for {company_name}: {emails[0]}")
+                        return emails[0], f"Contact page: {contact_url}"
+                
+                # Fall back to guessing common contact page paths
+                base_url = website.rstrip('/')
+                contact_urls = [base_url + page for page in CONTACT_PAGES if base_url + page not in discovered]
+                logger.info(f"Checking {len(contact_urls)} common contact pages on {base_url}")
+                count_stat('static_contact_fallbacks')
+                
+                contact_url, emails = await first_page_with_emails(contact_urls, session=http)
+                if emails:
+                    logger.info(f"Found email on contact page for {company_name}: {emails[0]}")
+                    return emails[0], f"Contact page: {contact_url}"
+        
+        logger.info(f"No emails found for {company_name} on {website}")
+        return None, f"No emails found on {website}"
+        
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding email for {company_name}: {str(e)}")
+        return None, f"Error: {str(e)}"
+
+def find_email_on_website(company_name, website):
+    """Check a company's website for an email (blocking wrapper)"""
+    return run_sync(find_email_on_website_async(company_name, website))
+
+async def find_company_email_async(company_name, session=None):
     """Find email for a company with improved search and error handling"""
     try:
         if not company_name:
@@ -171,54 +1770,556 @@ def find_company_email(company_name):
         logger.info(f"Searching for emails for: {company_name}")
         
         # Search for company website
-        website = search_company_website(company_name)
+        website = await resolve_company_website_async(company_name, session=session)
         if not website:
             logger.info(f"No website found for {company_name}")
             return None, f"No website found"
         
         logger.info(f"Found website for {company_name}: {website}")
+        return await find_email_on_website_async(company_name, website, session=session)
         
-        # Check main page first
-        emails = find_emails_on_page(website)
-        if emails:
-            logger.info(f"Found email on main page for {company_name}: {emails[0]}")
-            return emails[0], f"Main page: {website}"
-        
-        # Try common contact pages with better URL construction
-        if isinstance(website, str):
-            base_url = website.rstrip('/')
-            
-            # More comprehensive list of contact pages
-            contact_pages = [
-                '/contact', '/contact-us', '/contactus', '/contact_us',
-                '/about', '/about-us', '/aboutus', '/about_us',
-                '/team', '/staff', '/people',
-                '/info', '/information',
-                '/support', '/help'
-            ]
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding email for {company_name}: {str(e)}")
+        return None, f"Error: {str(e)}"
+
+def find_company_email(company_name):
+    """Find email for a company (blocking wrapper)"""
+    return run_sync(find_company_email_async(company_name))
+
+class LookupEngine:
+    """Resolves many companies concurrently on the fetch loop, with a concurrency limit per stage"""
+    
+    def __init__(self, search_workers=SEARCH_WORKERS, fetch_workers=FETCH_WORKERS):
+        self.search_workers = search_workers
+        self.fetch_workers = fetch_workers
+        self._search_limit = None
+        self._fetch_limit = None
+    
+    def _limits(self):
+        # Limits are shared by every job so the worker counts are global; only touched on the fetch loop
+        if self._search_limit is None:
+            self._search_limit = asyncio.Semaphore(self.search_workers)
+            self._fetch_limit = asyncio.Semaphore(self.fetch_workers)
+        return self._search_limit, self._fetch_limit
+    
+    async def _lookup(self, company_name, aliases=()):
+        search_limit, fetch_limit = self._limits()
+        # The deadline only runs while the company holds a worker slot, not while it queues for one
+        budget = COMPANY_DEADLINE
+        try:
+            async with search_limit:
+                started = time.monotonic()
+                company_deadline.set(started + budget)
+                website = await asyncio.wait_for(
+                    resolve_company_website_async(company_name, aliases=aliases), budget
+                )
+                budget -= time.monotonic() - started
+            if not website:
+                logger.info(f"No website found for {company_name}")
+                return None, "No website found"
             
-            for page in contact_pages:
+            logger.info(f"Found website for {company_name}: {website}")
+            async with fetch_limit:
+                company_deadline.set(time.monotonic() + budget)
+                return await asyncio.wait_for(find_email_on_website_async(company_name, website), budget)
+        except asyncio.TimeoutError:
+            count_stat('company_deadline_hits')
+            logger.info(f"Gave up on {company_name} after the {COMPANY_DEADLINE}s deadline")
+            return None, "Lookup timed out"
+    
+    async def run_async(self, company_names, on_result=None, stats=None, aliases=None):
+        """Look up every company and return (email, source) pairs in input order.
+        
+        aliases optionally gives, per company, other name keys that share its cached website.
+        """
+        if stats is not None:
+            job_stats.set(stats)
+        results = [(None, None)] * len(company_names)
+        
+        async def resolve(position, company_name):
+            try:
+                results[position] = await self._lookup(company_name, aliases[position] if aliases else ())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lookup failed for {company_name}: {str(e)}")
+                results[position] = (None, f"Error: {str(e)}")
+            if on_result:
+                on_result(position, results[position])
+        
+        tasks = []
+        for position, company_name in enumerate(company_names):
+            if not company_name:
+                if on_result:
+                    on_result(position, results[position])
+                continue
+            tasks.append(asyncio.ensure_future(resolve(position, company_name)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        return results
+    
+    def run(self, company_names, on_result=None, stats=None, aliases=None):
+        """Blocking wrapper around run_async; on_result is called from the calling thread"""
+        finished = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self.run_async(company_names, on_result=lambda position, result: finished.put((position, result)),
+                           stats=stats, aliases=aliases),
+            get_fetch_loop()
+        )
+        try:
+            while not (future.done() and finished.empty()):
                 try:
-                    contact_url = base_url + page
-                    logger.info(f"Checking contact page: {contact_url}")
-                    emails = find_emails_on_page(contact_url)
-                    if emails:
-                        logger.info(f"Found email on contact page for {company_name}: {emails[0]}")
-                        return emails[0], f"Contact page: {contact_url}"
-                    
-                    # Small delay between page requests
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    logger.error(f"Error checking contact page {contact_url}: {str(e)}")
+                    position, result = finished.get(timeout=0.5)
+                except queue.Empty:
                     continue
+                if on_result:
+                    on_result(position, result)
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+lookup_engine = LookupEngine()
+
+def create_job(filename, input_path, company_column, output_format='csv'):
+    """Insert a new queued job and return its id"""
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with closing(get_db()) as conn, conn:
+        conn.execute(
+            'INSERT INTO jobs (id, status, filename, input_path, company_column, output_format, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, 'queued', filename, input_path, company_column, output_format, now, now)
+        )
+    return job_id
+
+def update_job(job_id, **fields):
+    """Update columns of a job row"""
+    if 'stats' in fields and not isinstance(fields['stats'], str):
+        fields['stats'] = json.dumps(fields['stats'])
+    fields['updated_at'] = time.time()
+    assignments = ', '.join(f"{name} = ?" for name in fields)
+    with closing(get_db()) as conn, conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+def get_job(job_id):
+    """Fetch a job row as a dict, or None if it doesn't exist"""
+    with closing(get_db()) as conn:
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job['stats'] = json.loads(job['stats']) if job['stats'] else {}
+    return job
+
+def job_response(job):
+    """Build the JSON payload describing a job's progress and results"""
+    total_companies = job['total_companies'] or 0
+    emails_found = job['emails_found'] or 0
+    success_rate = (emails_found / total_companies * 100) if total_companies > 0 else 0
+    payload = {
+        'success': job['status'] != 'failed',
+        'job_id': job['id'],
+        'status': job['status'],
+        'filename': job['filename'],
+        'company_column_used': job['company_column'],
+        'total_rows': job['total_rows'] or 0,
+        'processed': job['processed'] or 0,
+        'total_companies': total_companies,
+        'emails_found': emails_found,
+        'success_rate': round(success_rate, 1),
+        'stats': job['stats'],
+    }
+    if job['status'] == 'completed':
+        payload['download_url'] = f"/jobs/{job['id']}/result"
+    if job['error']:
+        payload['error'] = job['error']
+    return payload
+
+def is_plural_of(word, other):
+    """True if word is other with a plural "s" or "es" added"""
+    return word in (other + 's', other + 'es')
+
+def singular_forms(word):
+    """The word itself and what it would be without a plural "s" or "es\""""
+    forms = [word]
+    if word.endswith('s'):
+        forms.append(word[:-1])
+        if word.endswith('es'):
+            forms.append(word[:-2])
+    return forms
+
+def names_match(a, b):
+    """True if two company keys can only be spellings of the same company.
+    
+    They match when they are equal once spaces are removed ("bella rose" and
+    "bellarose"), or word for word where each pair of words is equal or
+    differs only by a plural ("bella boutique" and "bella boutiques").
+    Near misses like "natalie" and "natalia" are usually different people's
+    shops, so they never match.
+    """
+    if a.replace(' ', '') == b.replace(' ', ''):
+        return True
+    words_a, words_b = a.split(), b.split()
+    if len(words_a) != len(words_b):
+        return False
+    return all(word_a == word_b or is_plural_of(word_a, word_b) or is_plural_of(word_b, word_a)
+               for word_a, word_b in zip(words_a, words_b))
+
+def cluster_company_keys(keys):
+    """Group company keys that names_match(), returning a cluster number for each key.
+    
+    Keys that are equal without spaces are merged outright. The rest are
+    blocked by every way of reading their words with a plural "s" or "es"
+    dropped, and all keys sharing a block are compared. Any two keys that
+    names_match() accepts share a block, so nothing is missed, and the blocks
+    stay small however many other names the file holds.
+    """
+    parent = list(range(len(keys)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    if not NAME_CLUSTERING:
+        return parent
+    
+    first_compact = {}
+    singular_blocks = {}
+    for i, key in enumerate(keys):
+        first = first_compact.setdefault(key.replace(' ', ''), i)
+        if first != i:
+            parent[find(i)] = find(first)
+        for words in itertools.product(*map(singular_forms, key.split())):
+            singular_blocks.setdefault(words, []).append(i)
+    
+    for members in singular_blocks.values():
+        for offset, a in enumerate(members):
+            for b in members[offset + 1:]:
+                if find(a) != find(b) and names_match(keys[a], keys[b]):
+                    parent[find(b)] = find(a)
+    return [find(i) for i in range(len(keys))]
+
+def dedupe_companies(company_names):
+    """Group names that normalize to the same company key or to near-duplicate keys.
+    
+    Returns the first spelling of each distinct company, for each of them
+    the positions in company_names that share its result, and the other
+    keys folded into it (so their cache entries can be shared too).
+    """
+    names = pd.Series(company_names, dtype=object)
+    keys = normalize_company_names(names).fillna(names.str.casefold())
+    key_codes, distinct_keys = pd.factorize(keys)
+    clusters = np.asarray(cluster_company_keys(list(distinct_keys)), dtype=np.intp)
+    codes, _ = pd.factorize(clusters[key_codes])
+    # factorize numbers clusters by first appearance, so a stable sort groups positions in input order
+    order = np.argsort(codes, kind='stable')
+    starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+    lookup_rows = [group.tolist() for group in np.split(order, starts[1:])] if len(order) else []
+    lookup_names = names.iloc[order[starts]].tolist()
+    lookup_aliases = []
+    for group in lookup_rows:
+        group_keys = list(dict.fromkeys(keys.iloc[group]))
+        lookup_aliases.append(group_keys[1:])
+    return lookup_names, lookup_rows, lookup_aliases
+
+def excel_header(values):
+    """Column names for a worksheet header row, naming blank cells the way pandas does"""
+    return [f'Unnamed: {i}' if value is None else value for i, value in enumerate(values)]
+
+def read_upload_columns(filepath, filename):
+    """Column names of an uploaded CSV or Excel file, reading only its header"""
+    if filename.endswith('.csv'):
+        return list(pd.read_csv(filepath, nrows=0).columns)
+    elif filename.endswith('.xlsx'):
+        workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            header = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+        return excel_header(header)
+    elif filename.endswith('.xls'):
+        return list(pd.read_excel(filepath, nrows=0).columns)
+    raise ValueError('Unsupported format')
+
+def iter_upload_chunks(filepath, filename, usecols=None, chunksize=UPLOAD_CHUNK_ROWS, dtype=None):
+    """Yield an uploaded CSV or Excel file as DataFrames of up to chunksize rows.
+    
+    Row labels run on across chunks (0, 1, 2, ...) so they identify a row in
+    the whole file. usecols limits which columns are loaded at all. Column
+    dtypes are inferred per chunk unless dtype is given (e.g. str).
+    """
+    if filename.endswith('.csv'):
+        yield from pd.read_csv(filepath, usecols=usecols, chunksize=chunksize, dtype=dtype)
+    elif filename.endswith('.xlsx'):
+        # Read-only mode streams rows from the sheet XML instead of loading the workbook
+        workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = excel_header(next(rows, ()))
+            keep = [i for i, column in enumerate(header) if usecols is None or column in usecols]
+            columns = [header[i] for i in keep]
+            start = 0
+            while True:
+                block = [[row[i] if i < len(row) else None for i in keep] for row in itertools.islice(rows, chunksize)]
+                if not block:
+                    break
+                chunk = pd.DataFrame(block, columns=columns, index=pd.RangeIndex(start, start + len(block)))
+                yield chunk if dtype is None else chunk.astype(dtype).where(chunk.notna())
+                start += len(block)
+        finally:
+            workbook.close()
+    elif filename.endswith('.xls'):
+        # xlrd can't stream, so legacy .xls files are loaded once, limited to the wanted columns
+        df = pd.read_excel(filepath, usecols=usecols, dtype=dtype)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        raise ValueError('Unsupported format')
+
+class CsvResultSink:
+    """Appends result chunks to a CSV file"""
+    extension = 'csv'
+    text_columns = False
+    
+    def __init__(self, path):
+        self.path = path
+        self._started = False
+    
+    def write(self, chunk):
+        chunk.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+    
+    def close(self):
+        if not self._started:
+            pd.DataFrame().to_csv(self.path, index=False)
+
+class ParquetResultSink:
+    """Appends result chunks to a Parquet file as row groups (needs pyarrow).
+    
+    The schema is fixed by the first chunk, so chunks should be read with
+    a stable dtype (see text_columns).
+    """
+    extension = 'parquet'
+    # Per-chunk dtype inference can turn an int column into float or object
+    # halfway through the file, so every input column is kept as text
+    text_columns = True
+    
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+    
+    def write(self, chunk):
+        if self._writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            # A column that is empty in the first chunk has no type yet; text is the safe guess
+            for i, field in enumerate(schema):
+                if pa.types.is_null(field.type):
+                    schema = schema.set(i, field.with_type(pa.string()))
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.write_table(pa.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False))
+    
+    def close(self):
+        if self._writer is None:
+            pq.write_table(pa.table({}), self.path)
+        else:
+            self._writer.close()
+
+class XlsxResultSink:
+    """Appends result chunks to a write-only XLSX workbook, saved on close"""
+    extension = 'xlsx'
+    text_columns = False
+    
+    def __init__(self, path):
+        self.path = path
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet('Results')
+        self._started = False
+    
+    def write(self, chunk):
+        if not self._started:
+            self._sheet.append([str(column) for column in chunk.columns])
+            self._started = True
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+            self._sheet.append(list(row))
+    
+    def close(self):
+        self._workbook.save(self.path)
+
+RESULT_SINKS = {sink.extension: sink for sink in (CsvResultSink, ParquetResultSink, XlsxResultSink)}
+
+def result_formats():
+    """Output formats usable in this environment"""
+    return [name for name in RESULT_SINKS if name != 'parquet' or pq is not None]
+
+def run_job(job_id):
+    """Look up emails for every row of a queued upload and write the results file"""
+    job = get_job(job_id)
+    if job is None:
+        logger.error(f"Job {job_id} not found")
+        return
+    
+    input_path = job['input_path']
+    company_column = job['company_column']
+    try:
+        update_job(job_id, status='running')
+        # First pass: only the company column is loaded, keeping the row label of each named row
+        row_labels = []
+        company_names = []
+        chunk_ends = []
+        total_rows = 0
+        for chunk in iter_upload_chunks(input_path, job['filename'], usecols=[company_column]):
+            total_rows += len(chunk)
+            names = chunk[company_column]
+            names = names[names.notna()].astype(str).str.strip()
+            names = names[names != '']
+            row_labels.extend(names.index.tolist())
+            company_names.extend(names.tolist())
+            chunk_ends.append(len(row_labels))
+        update_job(job_id, total_rows=total_rows)
         
-        logger.info(f"No emails found for {company_name} on {website}")
-        return None, f"No emails found on {website}"
+        skipped = total_rows - len(row_labels)
+        
+        # Resolve each distinct company once and fan the result out to all of its rows
+        lookup_names, lookup_rows, lookup_aliases = dedupe_companies(company_names)
+        row_lookups = [None] * len(row_labels)
+        
+        # Second pass runs alongside the lookups: the input is re-read a chunk at a
+        # time and each chunk is written out as soon as all of its rows are resolved
+        output_format = job['output_format'] or 'csv'
+        output_filename = f"email_results_{job_id}.{output_format}"
+        sink = RESULT_SINKS[output_format](os.path.join(app.config['UPLOAD_FOLDER'], output_filename))
+        output_chunks = iter_upload_chunks(input_path, job['filename'], dtype=str if sink.text_columns else None)
+        pending = [end - start for start, end in zip([0] + chunk_ends, chunk_ends)]
+        progress = {'completed': 0, 'emails_found': 0, 'written_chunks': 0, 'written': 0, 'written_emails': 0}
+        
+        def write_ready_chunks():
+            while progress['written_chunks'] < len(chunk_ends) and pending[progress['written_chunks']] == 0:
+                chunk_number = progress['written_chunks']
+                start = chunk_ends[chunk_number - 1] if chunk_number else 0
+                end = chunk_ends[chunk_number]
+                found = pd.DataFrame(row_lookups[start:end], columns=['found_email', 'email_source'],
+                                     index=row_labels[start:end], dtype=object)
+                found['found_email'] = found['found_email'].where(found['found_email'].astype(bool), None)
+                progress['written_emails'] += int(found['found_email'].notna().sum())
+                found = found.fillna({'found_email': 'Not found', 'email_source': 'N/A'})
+                found['processed_company_name'] = company_names[start:end]
+                # Inner join on the row label keeps only the rows that had a company name, in file order
+                chunk = next(output_chunks).merge(found, left_index=True, right_index=True)
+                sink.write(chunk)
+                progress['written_chunks'] += 1
+                progress['written'] += len(chunk)
+        
+        def on_result(position, result):
+            group_size = len(lookup_rows[position])
+            progress['completed'] += group_size
+            if result[0]:
+                progress['emails_found'] += group_size
+            for row_position in lookup_rows[position]:
+                row_lookups[row_position] = result
+                pending[bisect.bisect_right(chunk_ends, row_position)] -= 1
+            write_ready_chunks()
+            update_job(job_id, processed=skipped + progress['completed'],
+                       total_companies=progress['completed'], emails_found=progress['emails_found'])
+        
+        # Leading chunks without any company names can go out straight away
+        write_ready_chunks()
+        logger.info(f"[{job_id}] Looking up {len(lookup_names)} distinct companies for {len(row_labels)} rows")
+        stats = {
+            'distinct_companies': len(lookup_names),
+            'lookups_saved': len(row_labels) - len(lookup_names),
+            'fuzzy_name_merges': sum(len(aliases) for aliases in lookup_aliases),
+            'website_cache_hits': 0, 'website_cache_misses': 0,
+            'page_cache_hits': 0, 'page_cache_misses': 0,
+            'probes_cancelled': 0,
+            'discovered_contact_hits': 0, 'static_contact_fallbacks': 0,
+            'politeness_wait_s': 0,
+            'non_html_skipped': 0, 'pages_truncated': 0,
+            'structured_emails_found': 0,
+            'search_queries': 0, 'search_cache_hits': 0, 'search_requests_shared': 0,
+            'search_variants_skipped': 0,
+            'domain_guess_hits': 0,
+            'dns_lookups': 0, 'dns_cache_hits': 0, 'dns_dead_hosts': 0, 'dead_host_skips': 0,
+            'breaker_tripped_hosts': 0, 'breaker_skips': 0, 'breaker_time_saved_s': 0,
+            'company_deadline_hits': 0,
+        }
+        pools_before = http_pool_stats()
+        lookup_engine.run(lookup_names, on_result=on_result, stats=stats, aliases=lookup_aliases)
+        stats['http_pools'] = http_pool_usage(pools_before)
+        stats['politeness_wait_s'] = round(stats['politeness_wait_s'], 1)
+        stats['breaker_time_saved_s'] = round(stats['breaker_time_saved_s'], 1)
+        stats['latency'] = latency.stats()
+        
+        write_ready_chunks()
+        sink.close()
+        written, emails_found = progress['written'], progress['written_emails']
+        
+        update_job(job_id, status='completed', output_filename=output_filename,
+                   total_companies=written, emails_found=emails_found, stats=stats)
+        logger.info(f"[{job_id}] Completed: {emails_found} emails for {written} companies")
         
     except Exception as e:
-        logger.error(f"Error finding email for {company_name}: {str(e)}")
-        return None, f"Error: {str(e)}"
+        logger.error(f"[{job_id}] Job failed: {str(e)}")
+        update_job(job_id, status='failed', error=str(e))
+    finally:
+        if input_path and os.path.exists(input_path):
+            os.remove(input_path)
+
+job_queue = queue.Queue()
+_workers_lock = threading.Lock()
+_workers_started = False
+
+def job_worker():
+    """Background worker that runs queued jobs one at a time"""
+    while True:
+        job_id = job_queue.get()
+        try:
+            run_job(job_id)
+        except Exception as e:
+            logger.error(f"Worker error on job {job_id}: {str(e)}")
+        finally:
+            job_queue.task_done()
+
+def recover_jobs():
+    """Requeue jobs left queued or running by a previous process"""
+    with closing(get_db()) as conn:
+        rows = conn.execute(
+            "SELECT id, input_path FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+    for row in rows:
+        if row['input_path'] and os.path.exists(row['input_path']):
+            logger.info(f"Requeueing interrupted job {row['id']}")
+            update_job(row['id'], status='queued', processed=0)
+            job_queue.put(row['id'])
+        else:
+            update_job(row['id'], status='failed', error='Upload was lost before the job finished')
+
+def start_job_workers():
+    """Initialise the job store and start the worker pool (idempotent)"""
+    global _workers_started
+    with _workers_lock:
+        if _workers_started:
+            return
+        recover_jobs()
+        for i in range(JOB_WORKERS):
+            threading.Thread(target=job_worker, name=f"job-worker-{i}", daemon=True).start()
+        _workers_started = True
+        logger.info(f"Started {JOB_WORKERS} job workers")
+
+def enqueue_job(filename, input_path, company_column, output_format='csv'):
+    """Register an upload as a job and hand it to the worker pool"""
+    start_job_workers()
+    job_id = create_job(filename, input_path, company_column, output_format)
+    job_queue.put(job_id)
+    return job_id
 
 @app.route('/')
 def index():
@@ -237,9 +2338,12 @@ def index():
 <form id="uploadForm" enctype="multipart/form-data"><div class="mb-3">
 <label class="form-label">Select FashionGo Export File:</label>
 <input type="file" class="form-control" id="fileInput" name="file" accept=".csv,.xlsx,.xls" required></div>
+<div class="mb-3"><label class="form-label">Results format:</label>
+<select class="form-select" id="outputFormat"><option value="csv">CSV</option><option value="xlsx">Excel</option></select></div>
 <button type="submit" class="btn btn-primary btn-lg">🚀 Find Emails</button></form>
 <div id="loading" style="display:none" class="text-center mt-4">
 <div class="spinner-border text-primary"></div><h5 class="mt-3">Finding email addresses...</h5>
+<p class="text-muted" id="progressText">Uploading...</p>
 <p class="text-muted">This may take several minutes for large files</p></div>
 <div id="results" style="display:none" class="mt-4"><div class="alert alert-success">
 <h6>✅ Processing Complete!</h6><div class="row text-center mt-3">
@@ -253,21 +2357,26 @@ def index():
 <script>document.getElementById('uploadForm').addEventListener('submit',function(e){
 e.preventDefault();const file=document.getElementById('fileInput').files[0];
 if(!file){alert('Please select a file');return;}const formData=new FormData();formData.append('file',file);
+formData.append('output_format',document.getElementById('outputFormat').value);
 document.getElementById('loading').style.display='block';
 document.getElementById('results').style.display='none';
 document.getElementById('error').style.display='none';
 fetch('/upload',{method:'POST',body:formData}).then(r=>r.json()).then(data=>{
-document.getElementById('loading').style.display='none';if(data.success){
-document.getElementById('totalCompanies').textContent=data.total_companies;
-document.getElementById('emailsFound').textContent=data.emails_found;
-document.getElementById('successRate').textContent=data.success_rate+'%';
-document.getElementById('downloadBtn').onclick=()=>window.location.href=data.download_url;
-document.getElementById('results').style.display='block';}else{
-document.getElementById('errorText').textContent=data.error;
-document.getElementById('error').style.display='block';}}).catch(e=>{
-document.getElementById('loading').style.display='none';
-document.getElementById('errorText').textContent='Network error: '+e.message;
-document.getElementById('error').style.display='block';});});
+if(data.success){pollJob(data.status_url);}else{showError(data.error);}}).catch(e=>showError('Network error: '+e.message));});
+function pollJob(url){fetch(url).then(r=>r.json()).then(job=>{
+if(job.status==='completed'){document.getElementById('loading').style.display='none';
+document.getElementById('totalCompanies').textContent=job.total_companies;
+document.getElementById('emailsFound').textContent=job.emails_found;
+document.getElementById('successRate').textContent=job.success_rate+'%';
+document.getElementById('downloadBtn').onclick=()=>window.location.href=job.download_url;
+document.getElementById('results').style.display='block';}
+else if(job.status==='failed'||job.error){showError(job.error||'Job failed');}
+else{document.getElementById('progressText').textContent=job.status==='queued'?'Waiting in queue...':
+'Processed '+job.processed+' of '+job.total_rows+' rows';setTimeout(()=>pollJob(url),2000);}})
+.catch(e=>showError('Network error: '+e.message));}
+function showError(message){document.getElementById('loading').style.display='none';
+document.getElementById('errorText').textContent=message;
+document.getElementById('error').style.display='block';}
 function resetForm(){document.getElementById('results').style.display='none';
 document.getElementById('error').style.display='none';document.getElementById('fileInput').value='';}
 </script></body></html>'''
@@ -276,6 +2385,10 @@ document.getElementById('error').style.display='none';document.getElementById('f
 def health():
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/stats')
+def stats():
+    return jsonify({'http_pools': http_pool_stats(), 'latency': latency.stats()}), 200
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     try:
@@ -287,82 +2400,80 @@ def upload_file():
             return jsonify({'error': 'No file selected'}), 400
         
         filename = secure_filename(file.filename or 'upload.csv')
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"upload_{int(time.time())}_{filename}")
+        if not filename.endswith(('.csv', '.xlsx', '.xls')):
+            return jsonify({'error': 'Unsupported format'}), 400
+        
+        output_format = request.form.get('output_format', 'csv').lower()
+        if output_format not in result_formats():
+            return jsonify({'error': f'Unsupported output format. Available: {result_formats()}'}), 400
+        
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"upload_{uuid.uuid4().hex}_{filename}")
         file.save(filepath)
         
+        # Only read the header here; the worker streams the full file
         try:
-            if filename.endswith('.csv'):
-                df = pd.read_csv(filepath)
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(filepath)
-            else:
-                return jsonify({'error': 'Unsupported format'}), 400
+            columns = read_upload_columns(filepath, filename)
         except Exception as e:
+            os.remove(filepath)
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
-        finally:
-            if os.path.exists(filepath):
-                os.remove(filepath)
         
         # Find company column
         company_column = None
-        for col in ['companyName', 'shipToCompanyName', 'company_name', 'Company Name', 'Company', 'Name']:
-            if col in df.columns:
+        for col in COMPANY_COLUMNS:
+            if col in columns:
                 company_column = col
                 break
         
         if not company_column:
-            return jsonify({'error': f'No company column found. Available: {list(df.columns)}'}), 400
-        
-        # Process all companies (remove 5-company limit)
-        results = []
-        total_companies = len(df)
-        
-        for index, row in df.iterrows():
-            try:
-                company_name_val = row[company_column]
-                if pd.isna(company_name_val) or str(company_name_val).strip() == '':
-                    continue
-                
-                company_name = str(company_name_val).strip()
-                logger.info(f"Processing: {company_name}")
-                
-                email, source = find_company_email(company_name)
-                
-                result_row = row.to_dict()
-                result_row['found_email'] = email if email else 'Not found'
-                result_row['email_source'] = source if source else 'N/A'
-                result_row['processed_company_name'] = company_name
-                
-                results.append(result_row)
-                time.sleep(2)  # Be respectful to websites
-                
-            except Exception as e:
-                logger.error(f"Error processing row: {str(e)}")
-                continue
+            os.remove(filepath)
+            return jsonify({'error': f'No company column found. Available: {list(columns)}'}), 400
         
-        results_df = pd.DataFrame(results)
-        
-        output_filename = f"email_results_{int(time.time())}.csv"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
-        results_df.to_csv(output_path, index=False)
-        
-        total_processed = len(results_df)
-        emails_found = len(results_df[results_df['found_email'] != 'Not found'].index) if total_processed > 0 else 0
-        success_rate = (emails_found / total_processed * 100) if total_processed > 0 else 0
+        job_id = enqueue_job(filename, filepath, company_column, output_format)
+        logger.info(f"Queued job {job_id} for {filename}")
         
         return jsonify({
             'success': True,
-            'total_companies': total_processed,
-            'emails_found': emails_found,
-            'success_rate': round(success_rate, 1),
-            'download_url': f'/download/{output_filename}',
-            'company_column_used': company_column
-        })
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/jobs/{job_id}',
+            'result_url': f'/jobs/{job_id}/result',
+            'company_column_used': company_column,
+            'output_format': output_format,
+        }), 202
         
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    try:
+        start_job_workers()
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job_response(job))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    try:
+        start_job_workers()
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job['status'] != 'completed':
+            return jsonify({'error': f"Job is {job['status']}", 'status': job['status']}), 409
+        
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(job['output_filename']))
+        if not os.path.exists(filepath):
+            return jsonify({'error': 'File not found'}), 404
+        
+        return send_file(filepath, as_attachment=True, download_name=job['output_filename'])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
@@ -376,6 +2487,44 @@ def download_file(filename):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def fixture_site_page(slug, page):
+    """HTML for one page of a generated fixture site, or None if the site has no such page.
+    
+    The slug's hash decides where (if anywhere) the site shows its address:
+    on the homepage, on the contact page, obfuscated on the about page, or
+    nowhere, so local runs exercise every path through the lookup.
+    """
+    domain = f"{slug.replace('-', '')}.com"
+    layout = int(hashlib.sha256(slug.encode('utf-8')).hexdigest(), 16) % 4
+    nav = '<nav><a href="pages/contact">Contact</a> <a href="pages/about-us">About us</a></nav>'
+    if page == '':
+        body = f'<p>Welcome to {slug.replace("-", " ").title()}.</p>'
+        if layout == 0:
+            body += f'<footer>Email us: info@{domain}</footer>'
+    elif page == 'pages/contact':
+        nav = nav.replace('pages/', '../pages/')
+        body = f'<p>Write to <a href="mailto:sales@{domain}">sales@{domain}</a></p>' if layout == 1 else '<form></form>'
+    elif page == 'pages/about-us':
+        nav = nav.replace('pages/', '../pages/')
+        body = f'<p>Wholesale: hello [at] {domain.replace(".", " [dot] ")}</p>' if layout == 2 else '<p>Our story.</p>'
+    else:
+        return None
+    return f'<!doctype html><html><head><title>{slug}</title></head><body>{nav}{body}</body></html>'
+
+@app.route('/fixtures/sites/<slug>/', defaults={'page': ''})
+@app.route('/fixtures/sites/<slug>/<path:page>')
+def fixture_site(slug, page):
+    """Serve the generated websites LocalSearchProvider points at"""
+    if not any(provider.name == 'local' for provider in search_providers):
+        return jsonify({'error': 'Not found'}), 404
+    if LOCAL_FIXTURE_LATENCY:
+        time.sleep(LOCAL_FIXTURE_LATENCY)
+    content = fixture_site_page(slug, page.rstrip('/'))
+    if content is None:
+        return 'Not found', 404
+    return content, 200, {'Content-Type': 'text/html; charset=utf-8'}
+
 if __name__ == '__main__':
+    start_job_workers()
     port = int(os.environ.get('PORT', 5000))
     app.run(debug=False, host='0.0.0.0', port=port) 
\ No newline at end of file